@@ -0,0 +1,166 @@
+# ------------------------------------------------------------
+# Fast decoding of Polygon aggregate payloads into column arrays
+# ------------------------------------------------------------
+# finalassignment.py turns each response into bars like this:
+#     data = response.json()                  # list of dicts
+#     df = pd.DataFrame(data['results'])      # pandas infers every row
+#     df.rename(columns={'o': 'Open', ...})
+# For high-frequency bars the list-of-dicts → DataFrame step is the
+# hot spot.
+#
+# decode_aggs() goes from the raw response bytes straight to
+# preallocated float64 / int64 NumPy columns (np.fromiter with a known
+# count), and reinterprets the 't' milliseconds as datetime64[ms]
+# without a conversion pass. It picks the fastest decoder installed:
+#   msgspec  results decode into slot-only structs -- no dict per bar
+#   orjson   C decoder, dicts read through C-level itemgetters
+#   json     standard library fallback
+#
+#     frame, next_url = decode_aggs(response.content, 'AAPL')
+#
+# Run this file for a benchmark against the current path.
+# ------------------------------------------------------------
+
+import json
+from operator import attrgetter, itemgetter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import msgspec
+except ImportError:      # pragma: no cover - optional
+    msgspec = None
+try:
+    import orjson
+except ImportError:      # pragma: no cover - optional
+    orjson = None
+
+# Polygon field → output column, in output order
+FIELDS = [('o', 'Open'), ('h', 'High'), ('l', 'Low'), ('c', 'Close'), ('v', 'Volume')]
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# DECODERS: bytes → (sequence of bars, getter factory, next_url)
+# ───────────────────────────────────────────────────────────────────────────────
+
+if msgspec is not None:
+    class _Bar(msgspec.Struct, gc=False):
+        # only the fields we keep; msgspec skips the rest (vw, n, otc)
+        o: float
+        h: float
+        l: float
+        c: float
+        v: float
+        t: int
+
+    class _Aggs(msgspec.Struct, gc=False):
+        results: list[_Bar] = []
+        next_url: Optional[str] = None
+        status: str = ''
+
+    _MSGSPEC_DECODER = msgspec.json.Decoder(_Aggs)
+
+
+def _decode_msgspec(content):
+    payload = _MSGSPEC_DECODER.decode(content)
+    return payload.results, attrgetter, payload.next_url
+
+
+def _decode_orjson(content):
+    payload = orjson.loads(content)
+    return payload.get('results') or [], itemgetter, payload.get('next_url')
+
+
+def _decode_json(content):
+    payload = json.loads(content)
+    return payload.get('results') or [], itemgetter, payload.get('next_url')
+
+
+DECODERS = {'json': _decode_json}
+if orjson is not None:
+    DECODERS['orjson'] = _decode_orjson
+if msgspec is not None:
+    DECODERS['msgspec'] = _decode_msgspec
+
+# fastest available first
+DEFAULT_DECODER = next(name for name in ('msgspec', 'orjson', 'json') if name in DECODERS)
+
+# what a malformed payload raises, whichever decoder is in use. json and
+# orjson syntax errors are ValueErrors and msgspec has its own; with the
+# dict-based decoders a bar missing o/h/l/c/v/t raises KeyError, a null
+# bar or value TypeError, and a payload that is not an object AttributeError.
+DECODE_ERRORS = (ValueError, KeyError, TypeError, AttributeError) + (
+    (msgspec.DecodeError,) if msgspec is not None else ())
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PUBLIC API
+# ───────────────────────────────────────────────────────────────────────────────
+
+def decode_columns(content, decoder=None):
+    """Raw aggregates JSON → ({'Open': float64[], ..., 'Date': datetime64[ms][]}, next_url)."""
+    bars, getter, next_url = DECODERS[decoder or DEFAULT_DECODER](content)
+    n = len(bars)
+    columns = {}
+    for field, name in FIELDS:
+        columns[name] = np.fromiter(map(getter(field), bars), dtype=np.float64, count=n)
+    # epoch milliseconds are already datetime64[ms]; view, don't convert
+    columns['Date'] = np.fromiter(map(getter('t'), bars), dtype=np.int64, count=n).view('datetime64[ms]')
+    return columns, next_url
+
+
+def decode_aggs(content, ticker, decoder=None):
+    """Raw aggregates JSON → (bar DataFrame, next_url).
+
+    The frame has polygonfetch's columns and dtypes
+    (Open, High, Low, Close, Volume, Date, Ticker) in response order.
+    """
+    columns, next_url = decode_columns(content, decoder)
+    n = len(columns['Date'])
+    frame = pd.DataFrame(columns, copy=False)
+    frame['Ticker'] = pd.Series([ticker], dtype='str').repeat(n).to_numpy()
+    return frame, next_url
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    from fakepolygon import fake_bars
+
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    results = fake_bars('AAPL', '2022-01-03', str(pd.Timestamp('2022-01-03') + pd.Timedelta(days=days))[:10],
+                        timespan='minute')
+    content = json.dumps({'ticker': 'AAPL', 'status': 'OK', 'results': results}).encode('utf-8')
+    print(f"{len(results):,} minute bars, {len(content) / 1e6:.1f} MB of JSON")
+
+    def current_path():
+        # what finalassignment.py does today
+        data = json.loads(content)
+        df = pd.DataFrame(data['results'])
+        df['Date'] = pd.to_datetime(df['t'], unit='ms')
+        df.rename(columns={'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close',
+                           'v': 'Volume', 't': 'Timestamp'}, inplace=True)
+        df.drop(columns=['Timestamp', 'n', 'vw'], inplace=True)
+        df['Ticker'] = 'AAPL'
+        return df
+
+    def best_of(fn, repeat=3):
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - t0)
+        return best, out
+
+    base_time, expected = best_of(current_path)
+    print(f"  {'current (json + DataFrame(list of dicts))':<44} {1000 * base_time:8.1f} ms")
+    for name in DECODERS:
+        elapsed, (frame, _) = best_of(lambda: decode_aggs(content, 'AAPL', name))
+        same = all(np.array_equal(frame[c].to_numpy(), expected[c].to_numpy())
+                   for c in ['Open', 'High', 'Low', 'Close', 'Volume'])
+        same = same and (frame['Date'].to_numpy() == expected['Date'].to_numpy()).all()
+        print(f"  {'decode_aggs[' + name + ']':<44} {1000 * elapsed:8.1f} ms   "
+              f"x{base_time / elapsed:4.1f}   identical={same}")
@@ -0,0 +1,215 @@
+# ------------------------------------------------------------
+# On-disk cache of Polygon aggregate bars, one Parquet file per ticker
+# ------------------------------------------------------------
+# finalassignment.py downloads the full range/1/day/{start}/{end}
+# history for every ticker on every run. BarStore keeps what it has
+# already downloaded:
+#
+#     <root>/AAPL.parquet   the bars (Open, High, Low, Close, Volume, Date, Ticker)
+#     <root>/AAPL.json      the date intervals already fetched, e.g.
+#                           [["2022-01-01", "2022-12-31"]]
+#
+# File names are the URL-quoted ticker, so class shares and other
+# symbols with a slash stay inside <root> (BRK/B -> BRK%2FB.parquet).
+#
+# Intervals are tracked separately from the bars because weekends and
+# holidays legitimately have no bars -- a gap in the data is not a gap
+# in coverage. When asked for a range, only the uncovered pieces are
+# requested from Polygon; the new bars are merged into the file and the
+# answer is served from disk:
+#
+#     store = BarStore('polygon_cache', PolygonClient())
+#     df = store.get('AAPL', '2022-01-01', '2023-01-01')      # fetches
+#     df = store.get('AAPL', '2022-06-01', '2023-03-01')      # only 2023-01-02..03-01
+#     frames = store.get_many(['AAPL', 'MSFT'], '2022-01-01', '2023-01-01')
+#
+# Days from today onward are never marked as covered, because today's
+# bar is not final yet and future days have no data yet.
+# ------------------------------------------------------------
+
+import json
+import os
+from datetime import date, timedelta
+from urllib.parse import quote
+
+import pandas as pd
+
+from polygonfetch import BAR_DTYPES, empty_bars
+
+ONE_DAY = timedelta(days=1)
+BAR_COLUMNS = list(BAR_DTYPES)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# INTERVAL HELPERS (inclusive [start, end] date pairs)
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching [start, end] date intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(pair) for pair in merged]
+
+
+def missing_intervals(covered, start, end):
+    """Pieces of [start, end] not inside any `covered` interval."""
+    gaps = []
+    cursor = start
+    for c_start, c_end in merge_intervals(covered):
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, min(end, c_start - ONE_DAY)))
+        cursor = max(cursor, c_end + ONE_DAY)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# STORE
+# ───────────────────────────────────────────────────────────────────────────────
+
+class BarStore:
+    """Per-ticker Parquet bar cache that only fetches uncovered date ranges."""
+
+    def __init__(self, root, client=None, timespan='day', multiplier=1):
+        self.root = root
+        self.client = client
+        self.timespan = timespan
+        self.multiplier = multiplier
+        os.makedirs(root, exist_ok=True)
+
+    # ── files ────────────────────────────────────────────────────────────────
+
+    def _paths(self, ticker):
+        base = os.path.join(self.root, quote(ticker, safe=''))
+        return base + '.parquet', base + '.json'
+
+    def coverage(self, ticker):
+        """Date intervals already fetched for `ticker`."""
+        _, meta_path = self._paths(ticker)
+        if not os.path.exists(meta_path):
+            return []
+        with open(meta_path, 'r', encoding='utf-8') as fh:
+            meta = json.load(fh)
+        return [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in meta['covered']]
+
+    def read(self, ticker):
+        """Every stored bar for `ticker` (empty frame if none)."""
+        bars_path, _ = self._paths(ticker)
+        if not os.path.exists(bars_path):
+            return empty_bars()
+        return pd.read_parquet(bars_path)
+
+    def _write(self, ticker, bars, covered):
+        bars_path, meta_path = self._paths(ticker)
+        # bars first, then the coverage that describes them: a crash in
+        # between only means a range is fetched again next time.
+        tmp = bars_path + '.tmp'
+        bars.to_parquet(tmp, index=False)
+        os.replace(tmp, bars_path)
+        tmp = meta_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'covered': [[s.isoformat(), e.isoformat()] for s, e in covered]}, fh)
+        os.replace(tmp, meta_path)
+
+    def add(self, ticker, new_bars, start, end):
+        """Merge `new_bars` fetched for [start, end] into the store."""
+        start, end = _as_date(start), _as_date(end)
+        last_final = date.today() - ONE_DAY
+        bars = self.read(ticker)
+        if not new_bars.empty:
+            bars = new_bars if bars.empty else pd.concat([bars, new_bars], ignore_index=True)
+            # newest download wins for any bar fetched twice
+            bars = (bars.drop_duplicates(subset='Date', keep='last')
+                        .sort_values('Date')
+                        .reset_index(drop=True))
+        covered = self.coverage(ticker)
+        if start <= min(end, last_final):
+            covered = merge_intervals(covered + [(start, min(end, last_final))])
+        self._write(ticker, bars[BAR_COLUMNS] if not bars.empty else bars, covered)
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def gaps(self, ticker, start, end):
+        """Date ranges within [start, end] that still need fetching."""
+        return missing_intervals(self.coverage(ticker), _as_date(start), _as_date(end))
+
+    def _slice(self, ticker, start, end):
+        bars = self.read(ticker)
+        if bars.empty:
+            return bars
+        days = bars['Date'].dt.normalize()
+        mask = (days >= pd.Timestamp(start)) & (days <= pd.Timestamp(end))
+        return bars[mask].reset_index(drop=True)
+
+    def _require_client(self):
+        if self.client is None:
+            raise RuntimeError("BarStore has no client; pass one to fetch missing ranges")
+
+    def get(self, ticker, start, end):
+        """Bars for [start, end], fetching only the ranges not yet stored."""
+        return self.get_many([ticker], start, end).get(ticker, empty_bars())
+
+    def get_many(self, tickers, start, end):
+        """{ticker: bars in [start, end]}; all gaps are fetched concurrently."""
+        start, end = _as_date(start), _as_date(end)
+        jobs = [(ticker, g_start.isoformat(), g_end.isoformat())
+                for ticker in tickers
+                for g_start, g_end in self.gaps(ticker, start, end)]
+        if jobs:
+            self._require_client()
+            frames = self.client.fetch_many(jobs, multiplier=self.multiplier,
+                                            timespan=self.timespan)
+            failed = set(getattr(self.client, 'errors', {}))
+            for ticker, g_start, g_end in jobs:
+                if ticker in failed:
+                    continue      # leave the gap open so the next call retries it
+                fetched = frames.get(ticker, empty_bars())
+                days = fetched['Date'].dt.normalize() if not fetched.empty else None
+                piece = fetched if days is None else fetched[
+                    (days >= pd.Timestamp(g_start)) & (days <= pd.Timestamp(g_end))]
+                self.add(ticker, piece, g_start, g_end)
+
+        result = {}
+        for ticker in tickers:
+            bars = self._slice(ticker, start, end)
+            if not bars.empty:
+                result[ticker] = bars
+        return result
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    from fakepolygon import FakePolygonServer
+    from polygonfetch import PolygonClient
+
+    tickers = [f"T{i:03d}" for i in range(100)]
+    with FakePolygonServer(latency=0.02) as server, tempfile.TemporaryDirectory() as root:
+        store = BarStore(root, PolygonClient(api_key='test', base_url=server.base_url,
+                                             max_workers=16, requests_per_second=None))
+        for label, (start, end) in [('cold', ('2022-01-01', '2023-01-01')),
+                                    ('warm', ('2022-01-01', '2023-01-01')),
+                                    ('extend', ('2022-06-01', '2023-03-01'))]:
+            before = server.request_count
+            t0 = time.perf_counter()
+            frames = store.get_many(tickers, start, end)
+            print(f"{label:<7} {sum(map(len, frames.values())):>7,} bars "
+                  f"{time.perf_counter() - t0:6.2f}s  {server.request_count - before} requests")
@@ -0,0 +1,201 @@
+# ------------------------------------------------------------
+# Blocked, NaN-aware correlation for very wide return frames
+# ------------------------------------------------------------
+# returns_df.corr() (finalassignment.py) walks every column pair one at
+# a time, re-masking NaNs per pair. With thousands of
+# tickers that is slow, and the full k × k result may not fit next to
+# everything else.
+#
+# Here the pairwise-complete statistics for a block of columns I against
+# a block J all come from matrix products, so BLAS does the work:
+#     M = not-NaN mask, X = returns with NaN → 0 (columns pre-centered)
+#     n   = M_Iᵀ M_J          sx  = X_Iᵀ M_J        sy  = M_Iᵀ X_J
+#     sxx = (X_I²)ᵀ M_J       syy = M_Iᵀ (X_J²)     sxy = X_Iᵀ X_J
+#     corr = (n·sxy − sx·sy) / √((n·sxx − sx²)(n·syy − sy²))
+# which matches pandas' pairwise-complete corr() (min_periods too).
+# Blocks are block_size columns wide so the operands stay cache-sized,
+# and only the upper triangle of blocks is computed.
+#
+#     corr = pairwise_corr(returns_df)                        # DataFrame
+#     top = top_k_partners(returns_df, k=10)                  # long table
+#     mm = corr_to_disk(returns_df, 'corr.npy')               # memmap .npy
+# ------------------------------------------------------------
+
+import json
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BLOCK_SIZE = 256
+
+
+def _labels(returns):
+    if isinstance(returns, pd.DataFrame):
+        return returns.columns
+    return pd.RangeIndex(np.shape(returns)[1])
+
+
+def _prepare(returns):
+    """(centered values with NaN → 0, float mask)."""
+    values = np.asarray(returns, dtype='float64')
+    present = ~np.isnan(values)
+    x = np.where(present, values, 0.0)
+    # Centering by the column mean leaves correlations unchanged but keeps
+    # the raw sums small, so n·sxy − sx·sy does not lose precision.
+    means = x.sum(axis=0) / np.maximum(present.sum(axis=0), 1)
+    x = np.where(present, x - means, 0.0)
+    return x, present.astype('float64')
+
+
+def _block_corr(x, m, cols_i, cols_j, min_periods):
+    xi, xj, mi, mj = x[:, cols_i], x[:, cols_j], m[:, cols_i], m[:, cols_j]
+    n = mi.T @ mj
+    sx = xi.T @ mj
+    sy = mi.T @ xj
+    sxx = (xi * xi).T @ mj
+    syy = mi.T @ (xj * xj)
+    sxy = xi.T @ xj
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sy
+        result = cov / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    np.clip(result, -1.0, 1.0, out=result)
+    result[n < max(min_periods, 1)] = np.nan
+    return result
+
+
+def iter_corr_blocks(returns, block_size=DEFAULT_BLOCK_SIZE, min_periods=1, upper=True):
+    """Yield (row slice, column slice, block) of the correlation matrix.
+
+    upper=True yields only blocks on or above the diagonal (the rest are
+    their transposes); upper=False yields every block, row block by row block.
+    """
+    x, m = _prepare(returns)
+    k = x.shape[1]
+    starts = range(0, k, block_size)
+    for i0 in starts:
+        rows = slice(i0, min(i0 + block_size, k))
+        for j0 in (range(i0, k, block_size) if upper else starts):
+            cols = slice(j0, min(j0 + block_size, k))
+            block = _block_corr(x, m, rows, cols, min_periods)
+            if i0 == j0:
+                # a column with at least min_periods values correlates 1 with itself
+                diag = np.diagonal(block).copy()
+                np.fill_diagonal(block, np.where(np.isnan(diag), np.nan, 1.0))
+            yield rows, cols, block
+
+
+def pairwise_corr(returns, block_size=DEFAULT_BLOCK_SIZE, min_periods=1):
+    """Full correlation matrix, like returns_df.corr(min_periods=...)."""
+    labels = _labels(returns)
+    k = len(labels)
+    result = np.empty((k, k))
+    for rows, cols, block in iter_corr_blocks(returns, block_size, min_periods):
+        result[rows, cols] = block
+        result[cols, rows] = block.T
+    return pd.DataFrame(result, index=labels, columns=labels)
+
+
+def top_k_partners(returns, k=10, block_size=DEFAULT_BLOCK_SIZE, min_periods=1, by_abs=False):
+    """The k most correlated other tickers per ticker, without the full matrix.
+
+    Returns a long frame: Ticker, Partner, Corr, Rank (1 = most correlated).
+    by_abs=True ranks by |corr| so strong negative partners count too.
+    Memory is O(block_size × n_tickers) instead of O(n_tickers²).
+    """
+    labels = _labels(returns)
+    n_cols = len(labels)
+    k = min(k, max(n_cols - 1, 0))
+    best_pos = np.zeros((n_cols, k), dtype=np.intp)
+    best_val = np.zeros((n_cols, k))
+
+    current, row_block = None, []
+
+    def flush():
+        rows = current
+        full = np.hstack([b for _, b in sorted(row_block, key=lambda item: item[0])])
+        full[np.arange(full.shape[0]), np.arange(rows.start, rows.stop)] = np.nan   # not itself
+        score = np.abs(full) if by_abs else full.copy()
+        score = np.where(np.isnan(score), -np.inf, score)
+        top = np.argpartition(-score, k - 1, axis=1)[:, :k] if k else np.empty((len(full), 0), np.intp)
+        order = np.argsort(-np.take_along_axis(score, top, axis=1), axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        best_pos[rows] = top
+        best_val[rows] = np.take_along_axis(full, top, axis=1)
+
+    for rows, cols, block in iter_corr_blocks(returns, block_size, min_periods, upper=False):
+        if current is not None and rows != current:
+            flush()
+            row_block = []
+        current = rows
+        row_block.append((cols.start, block))
+    if current is not None and k:
+        flush()
+
+    result = pd.DataFrame({
+        'Ticker': np.repeat(np.asarray(labels), k),
+        'Partner': np.asarray(labels)[best_pos.ravel()],
+        'Corr': best_val.ravel(),
+        'Rank': np.tile(np.arange(1, k + 1), n_cols),
+    })
+    return result[result['Corr'].notna()].reset_index(drop=True)
+
+
+def corr_to_disk(returns, path, block_size=DEFAULT_BLOCK_SIZE, min_periods=1, dtype='float32'):
+    """Write the correlation matrix block by block into a .npy file.
+
+    Only one block is in memory at a time; the column labels go to
+    `<path>.tickers.json`. Returns the matrix opened read-only as a memmap.
+    """
+    labels = _labels(returns)
+    k = len(labels)
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(k, k))
+    for rows, cols, block in iter_corr_blocks(returns, block_size, min_periods):
+        out[rows, cols] = block
+        out[cols, rows] = block.T
+    out.flush()
+    del out
+    with open(path + '.tickers.json', 'w', encoding='utf-8') as fh:
+        json.dump([str(label) for label in labels], fh)
+    return np.load(path, mmap_mode='r')
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+    import tempfile
+    import time
+
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = np.random.default_rng(0)
+    n_days = 1250
+    market = rng.normal(size=(n_days, 1))
+    returns = market * rng.uniform(0.2, 1.0, n_tickers) + rng.normal(size=(n_days, n_tickers))
+    returns[rng.random(returns.shape) < 0.02] = np.nan        # holidays / missing bars
+    returns_df = pd.DataFrame(returns, columns=[f"T{i:04d}" for i in range(n_tickers)])
+    print(f"{n_days:,} days × {n_tickers:,} tickers, 2% NaN")
+
+    t0 = time.perf_counter()
+    expected = returns_df.corr()
+    t1 = time.perf_counter()
+    corr = pairwise_corr(returns_df)
+    t2 = time.perf_counter()
+    print(f"  returns_df.corr()   {t1 - t0:7.2f}s")
+    print(f"  pairwise_corr       {t2 - t1:7.2f}s   x{(t1 - t0) / (t2 - t1):.0f}   "
+          f"max |diff| = {np.nanmax(np.abs(corr.to_numpy() - expected.to_numpy())):.1e}")
+
+    t0 = time.perf_counter()
+    top = top_k_partners(returns_df, k=5)
+    t1 = time.perf_counter()
+    others = expected.where(~np.eye(n_tickers, dtype=bool))
+    check = {t: others[t].nlargest(5).index.tolist() for t in returns_df.columns[:50]}
+    same = all(top[top['Ticker'] == t]['Partner'].tolist() == check[t] for t in returns_df.columns[:50])
+    print(f"  top_k_partners(5)   {t1 - t0:7.2f}s   same partners={same}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corr.npy')
+        t0 = time.perf_counter()
+        mm = corr_to_disk(returns_df, path)
+        t1 = time.perf_counter()
+        print(f"  corr_to_disk        {t1 - t0:7.2f}s   {os.path.getsize(path) / 1e6:.0f} MB   "
+              f"same={np.allclose(mm, expected, atol=1e-6, equal_nan=True)}")
+        del mm
@@ -0,0 +1,220 @@
+# ------------------------------------------------------------
+# Headless, batched PNG rendering for the finalassignment charts
+# ------------------------------------------------------------
+# finalassignment.py draws each chart with plt.figure(...) ... plt.show(),
+# which needs a display, builds a new figure every time, and hands
+# matplotlib every single point even when the image is only ~1000 pixels
+# wide. For a nightly run over hundreds of tickers:
+#
+#   * Figure + FigureCanvasAgg directly (no pyplot, no GUI backend)
+#   * one figure per chart kind, built once; each ticker only updates
+#     the line data (set_data), histogram (StepPatch.set_data) and title
+#   * series are decimated to min/max per pixel column first, so the
+#     picture is the same but matplotlib draws ~2 points per pixel
+#   * tickers are split across worker processes, each with its own
+#     renderer, and the PNGs go to an output directory
+#
+#     paths = render_universe(price_df, 'charts', ma_df=ma20_df, returns_df=returns_df)
+#     # charts/AAPL_price.png, charts/AAPL_returns.png, ...
+#
+# File names use the URL-quoted ticker, like BarStore, so a symbol with
+# a slash stays inside `out_dir` (BRK/B -> BRK%2FB_price.png).
+# ------------------------------------------------------------
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+from matplotlib.figure import Figure
+
+PRICE_SIZE = (10, 6)
+HIST_SIZE = (8, 5)
+DPI = 100
+HIST_BINS = 50
+
+
+def decimate(x, y, n_pixels):
+    """Keep the first, min, max and last point of each pixel column.
+
+    Lines drawn from the result look the same at n_pixels width, but have
+    at most ~4 points per pixel however long the series is. NaNs are kept
+    out of the min/max but gaps still break the line.
+    """
+    n = len(y)
+    if n <= 4 * n_pixels:
+        return x, y
+    bucket = np.arange(n) * n_pixels // n
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    stops = np.r_[starts[1:], n]
+    filled_lo = np.where(np.isnan(y), np.inf, y)
+    filled_hi = np.where(np.isnan(y), -np.inf, y)
+    lo = starts + np.array([np.argmin(filled_lo[a:b]) for a, b in zip(starts, stops)])
+    hi = starts + np.array([np.argmax(filled_hi[a:b]) for a, b in zip(starts, stops)])
+    keep = np.unique(np.concatenate([starts, lo, hi, stops - 1]))
+    return x[keep], y[keep]
+
+
+class ChartRenderer:
+    """Reusable Agg figures for the price/MA line chart and the returns histogram."""
+
+    def __init__(self, dpi=DPI):
+        self.dpi = dpi
+
+        self.price_fig = Figure(figsize=PRICE_SIZE, dpi=dpi)
+        FigureCanvasAgg(self.price_fig)
+        self.price_ax = self.price_fig.add_subplot()
+        self.close_line, = self.price_ax.plot([], [], color='blue', label='Close')
+        self.ma_line, = self.price_ax.plot([], [], color='orange', label='20-day MA')
+        self.price_ax.set_xlabel('Date')
+        self.price_ax.set_ylabel('Price (USD)')
+        locator = AutoDateLocator()
+        self.price_ax.xaxis.set_major_locator(locator)
+        self.price_ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+        self.price_ax.legend(loc='upper left')
+
+        self.hist_fig = Figure(figsize=HIST_SIZE, dpi=dpi)
+        FigureCanvasAgg(self.hist_fig)
+        self.hist_ax = self.hist_fig.add_subplot()
+        self.hist_patch = self.hist_ax.stairs([0], [0, 1], fill=True, alpha=0.7)
+        self.hist_ax.set_xlabel('Daily Return (%)')
+        self.hist_ax.set_ylabel('Frequency')
+
+    def _pixels(self, fig):
+        return int(fig.get_figwidth() * self.dpi)
+
+    def price_chart(self, path, ticker, dates, close, ma=None):
+        """Close (and optional moving average) vs date → PNG at `path`."""
+        x = np.asarray(dates, dtype='datetime64[ns]')
+        width = self._pixels(self.price_fig)
+        self.close_line.set_data(*decimate(x, np.asarray(close, dtype='float64'), width))
+        if ma is None:
+            self.ma_line.set_data([], [])
+        else:
+            self.ma_line.set_data(*decimate(x, np.asarray(ma, dtype='float64'), width))
+        self.ma_line.set_visible(ma is not None)
+        self.price_ax.set_title(f'{ticker}: Close Price vs 20-day Moving Average'
+                                if ma is not None else f'{ticker}: Daily Closing Price')
+        self.price_ax.relim()
+        self.price_ax.autoscale_view()
+        self.price_fig.savefig(path)
+
+    def return_histogram(self, path, ticker, returns, bins=HIST_BINS):
+        """Distribution of daily returns → PNG at `path`."""
+        returns = np.asarray(returns, dtype='float64')
+        returns = returns[~np.isnan(returns)]
+        counts, edges = np.histogram(returns, bins=bins) if len(returns) else ([0], [0, 1])
+        self.hist_patch.set_data(counts, edges)
+        self.hist_ax.set_title(f'{ticker}: Distribution of Daily Returns')
+        self.hist_ax.set_xlim(edges[0], edges[-1])
+        self.hist_ax.set_ylim(0, max(counts) * 1.05 or 1)
+        self.hist_fig.savefig(path)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# BATCH RENDERING
+# ───────────────────────────────────────────────────────────────────────────────
+
+_worker = {}
+
+
+def _init_worker(dates, dpi):
+    _worker['dates'] = dates
+    _worker['renderer'] = ChartRenderer(dpi)
+
+
+def _render_batch(out_dir, batch):
+    """batch: [(ticker, close, ma or None, returns or None), ...]"""
+    renderer, dates = _worker['renderer'], _worker['dates']
+    paths = []
+    for ticker, close, ma, returns in batch:
+        base = os.path.join(out_dir, quote(ticker, safe=''))
+        path = f'{base}_price.png'
+        renderer.price_chart(path, ticker, dates, close, ma)
+        paths.append(path)
+        if returns is not None:
+            path = f'{base}_returns.png'
+            renderer.return_histogram(path, ticker, returns)
+            paths.append(path)
+    return paths
+
+
+def render_universe(price_df, out_dir, ma_df=None, returns_df=None, tickers=None,
+                    workers=None, batch_size=16, dpi=DPI):
+    """Render every ticker's charts to PNGs in `out_dir`; returns the file paths.
+
+    workers=1 renders in this process; otherwise tickers are spread over a
+    process pool in batches of `batch_size`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tickers = list(price_df.columns if tickers is None else tickers)
+    dates = price_df.index.to_numpy(dtype='datetime64[ns]')
+
+    def column(frame, ticker):
+        if frame is None or ticker not in frame:
+            return None
+        return frame[ticker].reindex(price_df.index).to_numpy(dtype='float64')
+
+    jobs = [(t, price_df[t].to_numpy(dtype='float64'), column(ma_df, t),
+             None if returns_df is None or t not in returns_df else returns_df[t].to_numpy(dtype='float64'))
+            for t in tickers]
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(dates, dpi)
+        results = [_render_batch(out_dir, batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(dates, dpi)) as pool:
+            results = list(pool.map(_render_batch, [out_dir] * len(batches), batches))
+    return [path for paths in results for path in paths]
+
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+    import time
+
+    import pandas as pd
+
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2018-01-01', periods=5 * 252, name='Date')
+    price_df = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), n_tickers)), axis=0)),
+                            index=dates, columns=[f"T{i:03d}" for i in range(n_tickers)])
+    ma20_df = price_df.rolling(window=20).mean()
+    returns_df = (price_df.pct_change() * 100).dropna(how='all')
+    print(f"{n_tickers} tickers × {len(dates):,} days, 2 charts each, {os.cpu_count()} cores")
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        # what finalassignment.py does, with savefig in place of show(), at
+        # the same figure sizes and dpi as the renderer
+        t0 = time.perf_counter()
+        for tic in price_df.columns:
+            plt.figure(figsize=PRICE_SIZE, dpi=DPI)
+            plt.plot(price_df.index, price_df[tic], label=f'{tic} Close', color='blue')
+            plt.plot(price_df.index, ma20_df[tic], label=f'{tic} 20-day MA', color='orange')
+            plt.title(f'{tic}: Close Price vs 20-day Moving Average')
+            plt.legend()
+            plt.savefig(os.path.join(out_dir, f'plt_{tic}_price.png'))
+            plt.close()
+            plt.figure(figsize=HIST_SIZE, dpi=DPI)
+            plt.hist(returns_df[tic].dropna(), bins=50, alpha=0.5, label=tic)
+            plt.savefig(os.path.join(out_dir, f'plt_{tic}_returns.png'))
+            plt.close()
+        t1 = time.perf_counter()
+        print(f"  pyplot, new figure per chart   {t1 - t0:6.2f}s")
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            t0 = time.perf_counter()
+            paths = render_universe(price_df, out_dir, ma_df=ma20_df, returns_df=returns_df,
+                                    workers=workers)
+            print(f"  render_universe(workers={workers:>2})   {time.perf_counter() - t0:6.2f}s   "
+                  f"{len(paths)} PNGs")
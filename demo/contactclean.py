@@ -0,0 +1,180 @@
+# ------------------------------------------------------------
+# Batch normalizer for the customers Phone / EmailAddress fields
+# ------------------------------------------------------------
+# demoweek4 builds CleanPhone, AreaCode and EmailDomain with one Python
+# lambda per customer, and demoweek5 validates the same fields with
+# regex .str.match / .str.replace. On a large customer master every
+# one of those calls creates Python string objects row by row.
+#
+# normalize_contacts() derives all of the fields in one call:
+#     CleanPhone   digits only                      '2455550173'
+#     AreaCode     first 3 digits (10+ digits only) '245'
+#     PhoneValid   matches ###-###-####              True
+#     EmailUser    text before the last '@'          'orlando0'
+#     EmailDomain  text after the last '@', lower    'adventure-works.com'
+#     EmailValid   matches the demoweek5 pattern     True
+#
+# With pyarrow installed, each field is one or two Arrow compute kernels
+# over the whole column (no per-row Python objects) and the text
+# results come back as pyarrow-backed string columns. Without pyarrow
+# the same logic runs on pandas' 'string' dtype.
+# ------------------------------------------------------------
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:   # pragma: no cover - pyarrow is optional
+    pa = None
+    pc = None
+
+# Same patterns as demoweek5
+EMAIL_PATTERN = r'^[A-Za-z0-9._-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$'
+PHONE_PATTERN = r'^\d{3}-\d{3}-\d{4}$'
+
+# user = everything before the LAST '@', domain = everything after it
+# (matches e.split('@')[-1] in demoweek4)
+_EMAIL_PARTS = r'^(?P<user>.*)@(?P<domain>[^@]*)$'
+
+CONTACT_COLUMNS = ['CleanPhone', 'AreaCode', 'PhoneValid',
+                   'EmailUser', 'EmailDomain', 'EmailValid']
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# ARROW PATH
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _to_arrow(series):
+    # string[pyarrow] columns hand over their buffers; anything else is
+    # converted once into an Arrow string array.
+    return pa.array(series, type=pa.string(), from_pandas=True)
+
+
+def _arrow_str(values, index):
+    return pd.Series(pd.arrays.ArrowStringArray(values), index=index)
+
+
+def _arrow_flag(mask, index):
+    return pd.Series(pc.fill_null(mask, False).to_numpy(zero_copy_only=False),
+                     index=index, dtype='bool')
+
+
+def _normalize_arrow(phone, email):
+    index = phone.index
+    phone_arr = _to_arrow(phone)
+    email_arr = _to_arrow(email)
+
+    # most numbers are ###-###-####: drop the dashes with a plain
+    # replace and run the regex only on the rows with other characters
+    digits = pc.replace_substring(phone_arr, '-', '')
+    other = pc.invert(pc.fill_null(pc.match_substring_regex(phone_arr, r'^[0-9-]*$'), True))
+    if pc.any(other).as_py():
+        digits = pc.replace_with_mask(
+            digits, other, pc.replace_substring_regex(phone_arr.filter(other), r'\D', ''))
+    area = pc.if_else(pc.greater_equal(pc.utf8_length(digits), 10),
+                      pc.utf8_slice_codeunits(digits, 0, 3),
+                      pa.scalar(None, pa.string()))
+
+    # split once at the last '@'; addresses without one give a single
+    # piece, and their user/domain are taken at a null position
+    parts = pc.split_pattern(email_arr, '@', max_splits=1, reverse=True)
+    starts = parts.offsets.to_numpy()[:-1]
+    no_at = pc.fill_null(pc.not_equal(pc.list_value_length(parts), 2), True).to_numpy(zero_copy_only=False)
+    pieces = parts.flatten()
+    user = pc.take(pieces, pa.array(starts, mask=no_at))
+    domain = pc.utf8_lower(pc.take(pieces, pa.array(starts + 1, mask=no_at)))
+
+    return pd.DataFrame({
+        'CleanPhone': _arrow_str(digits, index),
+        'AreaCode': _arrow_str(area, index),
+        'PhoneValid': _arrow_flag(pc.match_substring_regex(phone_arr, PHONE_PATTERN), index),
+        'EmailUser': _arrow_str(user, index),
+        'EmailDomain': _arrow_str(domain, index),
+        'EmailValid': _arrow_flag(pc.match_substring_regex(email_arr, EMAIL_PATTERN), index),
+    }, index=index)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PANDAS 'string' FALLBACK
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _normalize_pandas(phone, email):
+    phone = phone.astype('string')
+    email = email.astype('string')
+
+    digits = phone.str.replace(r'\D', '', regex=True)
+    area = digits.str.slice(0, 3).where(digits.str.len() >= 10)
+
+    parts = email.str.extract(_EMAIL_PARTS)
+
+    return pd.DataFrame({
+        'CleanPhone': digits,
+        'AreaCode': area,
+        'PhoneValid': phone.str.match(PHONE_PATTERN).fillna(False).astype('bool'),
+        'EmailUser': parts['user'],
+        'EmailDomain': parts['domain'].str.lower(),
+        'EmailValid': email.str.match(EMAIL_PATTERN).fillna(False).astype('bool'),
+    }, index=phone.index)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PUBLIC API
+# ───────────────────────────────────────────────────────────────────────────────
+
+def normalize_contacts(customers, phone_col='Phone', email_col='EmailAddress',
+                       use_arrow=None):
+    """Return a DataFrame of CONTACT_COLUMNS aligned to `customers`' index.
+
+    Missing phones/emails give missing text fields and False flags.
+    `use_arrow=None` picks the Arrow path whenever pyarrow is importable.
+    """
+    if use_arrow is None:
+        use_arrow = pa is not None
+    if use_arrow and pa is None:
+        raise ImportError("use_arrow=True requires pyarrow")
+    phone = customers[phone_col]
+    email = customers[email_col]
+    if use_arrow:
+        return _normalize_arrow(phone, email)
+    return _normalize_pandas(phone, email)
+
+
+def add_contact_columns(customers, **kwargs):
+    """Return a copy of `customers` with the CONTACT_COLUMNS appended/replaced."""
+    contacts = normalize_contacts(customers, **kwargs)
+    return customers.drop(columns=CONTACT_COLUMNS, errors='ignore').join(contacts)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    from salesloader import load_table
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    base = load_table('customers')
+    customers = base.iloc[[i % len(base) for i in range(n)]].reset_index(drop=True)
+
+    # the same six fields the way the demos build them: demoweek4's
+    # per-row lambdas, demoweek5's .str.match for the two flags
+    t0 = time.perf_counter()
+    customers['CleanPhone'] = customers['Phone'].apply(
+        lambda p: ''.join(filter(str.isdigit, p)) if isinstance(p, str) else None)
+    customers['AreaCode'] = customers['CleanPhone'].apply(
+        lambda num: num[:3] if isinstance(num, str) and len(num) >= 10 else None)
+    customers['PhoneValid'] = customers['Phone'].str.match(PHONE_PATTERN).fillna(False).astype(bool)
+    customers['EmailUser'] = customers['EmailAddress'].apply(
+        lambda e: e.rsplit('@', 1)[0] if isinstance(e, str) and '@' in e else None)
+    customers['EmailDomain'] = customers['EmailAddress'].apply(
+        lambda e: e.split('@')[-1].lower() if isinstance(e, str) and '@' in e else None)
+    customers['EmailValid'] = customers['EmailAddress'].str.match(EMAIL_PATTERN).fillna(False).astype(bool)
+    t1 = time.perf_counter()
+    result = normalize_contacts(customers)
+    t2 = time.perf_counter()
+
+    print(f"{n:,} customers, {len(CONTACT_COLUMNS)} fields: per-row lambdas + .str.match {t1 - t0:.2f}s   "
+          f"normalize_contacts {t2 - t1:.2f}s")
+    for col in CONTACT_COLUMNS:
+        same = customers[col].astype('string').equals(result[col].astype('string'))
+        print(f"  {col:<12} matches the demos: {same}")
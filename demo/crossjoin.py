@@ -0,0 +1,164 @@
+# ------------------------------------------------------------
+# Guarded, chunked cross join (customers × product)
+# ------------------------------------------------------------
+# assignments/week5.py and demoweek4 run
+#     pd.merge(customers[['CustomerID']], product[['ProductID']], how='cross')
+# which materializes len(customers) * len(product) rows in one go.
+# With production-sized tables that no longer fits in memory.
+#
+# This module:
+#   * estimate_cross_join()  rows and bytes BEFORE building anything
+#   * cross_join_chunks()    yields the Cartesian product in fixed-size
+#                            chunks, so downstream code (e.g. scoring every
+#                            customer–product pair) consumes it incrementally
+#   * cross_join()           drop-in for merge(how='cross') that refuses
+#                            to build more than a row budget
+#   * spill_cross_join()     writes the chunks to Parquet files instead
+#
+#     for pairs in cross_join_chunks(customers[['CustomerID']],
+#                                    product[['ProductID', 'ListPrice']],
+#                                    chunk_rows=500_000):
+#         scores = score(pairs)      # only one chunk is in memory at a time
+# ------------------------------------------------------------
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+DEFAULT_MAX_ROWS = 10_000_000     # cross_join() refuses anything larger
+
+
+class CrossJoinTooLarge(ValueError):
+    """Raised when a cross join would exceed its row budget."""
+
+
+def estimate_cross_join(left, right):
+    """Return {'rows', 'bytes', 'bytes_per_row'} for left × right."""
+    rows = len(left) * len(right)
+
+    def per_row(df):
+        if len(df) == 0:
+            return 0.0
+        return df.memory_usage(deep=True, index=False).sum() / len(df)
+
+    bytes_per_row = per_row(left) + per_row(right)
+    return {
+        'rows': rows,
+        'bytes': int(rows * bytes_per_row),
+        'bytes_per_row': bytes_per_row,
+    }
+
+
+def _check_budget(left, right, max_rows):
+    if max_rows is None:
+        return
+    est = estimate_cross_join(left, right)
+    if est['rows'] > max_rows:
+        raise CrossJoinTooLarge(
+            f"cross join of {len(left):,} × {len(right):,} rows = {est['rows']:,} rows "
+            f"(~{est['bytes'] / 1e9:.1f} GB) exceeds the budget of {max_rows:,} rows; "
+            f"use cross_join_chunks() or spill_cross_join() instead"
+        )
+
+
+def _output_names(left, right, suffixes):
+    # Same naming as pd.merge: overlapping columns get suffixes
+    overlap = set(left.columns) & set(right.columns)
+    left_names = [f"{c}{suffixes[0]}" if c in overlap else c for c in left.columns]
+    right_names = [f"{c}{suffixes[1]}" if c in overlap else c for c in right.columns]
+    return left_names, right_names
+
+
+def cross_join_chunks(left, right, chunk_rows=DEFAULT_CHUNK_ROWS, max_rows=None,
+                      suffixes=('_x', '_y')):
+    """Yield left × right in chunks of at most `chunk_rows` rows.
+
+    Row order matches pd.merge(left, right, how='cross'): every right row
+    for the first left row, then every right row for the second, and so on.
+    The chunks carry a RangeIndex continuing across chunks.
+    """
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1")
+    _check_budget(left, right, max_rows)
+
+    n_left, n_right = len(left), len(right)
+    total = n_left * n_right
+    left_names, right_names = _output_names(left, right, suffixes)
+    left_cols = [left[c].array for c in left.columns]
+    right_cols = [right[c].array for c in right.columns]
+
+    for start in range(0, total, chunk_rows):
+        stop = min(start + chunk_rows, total)
+        flat = np.arange(start, stop, dtype=np.int64)
+        left_pos, right_pos = np.divmod(flat, n_right)
+        yield _take_pairs(left_names, left_cols, left_pos, right_names, right_cols, right_pos,
+                          pd.RangeIndex(start, stop))
+
+
+def _take_pairs(left_names, left_cols, left_pos, right_names, right_cols, right_pos, index):
+    data = {}
+    for name, values in zip(left_names, left_cols):
+        data[name] = values.take(left_pos)
+    for name, values in zip(right_names, right_cols):
+        data[name] = values.take(right_pos)
+    return pd.DataFrame(data, index=index)
+
+
+def cross_join(left, right, max_rows=DEFAULT_MAX_ROWS, suffixes=('_x', '_y')):
+    """pd.merge(left, right, how='cross') with a row budget.
+
+    Raises CrossJoinTooLarge instead of trying to allocate more than
+    `max_rows` rows. Pass max_rows=None to disable the guard.
+    """
+    _check_budget(left, right, max_rows)
+    chunks = list(cross_join_chunks(left, right, chunk_rows=max(len(left) * len(right), 1),
+                                    suffixes=suffixes))
+    if not chunks:
+        # zero rows, but each column keeps its input dtype, as with pd.merge
+        left_names, right_names = _output_names(left, right, suffixes)
+        none = np.empty(0, dtype=np.int64)
+        return _take_pairs(left_names, [left[c].array for c in left.columns], none,
+                           right_names, [right[c].array for c in right.columns], none,
+                           pd.RangeIndex(0))
+    return chunks[0].reset_index(drop=True)
+
+
+def spill_cross_join(left, right, out_dir, chunk_rows=DEFAULT_CHUNK_ROWS,
+                     max_rows=None, suffixes=('_x', '_y')):
+    """Write left × right to `out_dir` as part-00000.parquet, ... ; return the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, chunk in enumerate(cross_join_chunks(left, right, chunk_rows, max_rows, suffixes)):
+        path = os.path.join(out_dir, f"part-{i:05d}.parquet")
+        chunk.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+if __name__ == '__main__':
+    from salesloader import load_table
+
+    customers = load_table('customers')[['CustomerID']]
+    product = load_table('product')[['ProductID', 'ListPrice']]
+
+    est = estimate_cross_join(customers, product)
+    print(f"customers × product: {est['rows']:,} rows, ~{est['bytes'] / 1e6:.1f} MB")
+
+    # Incremental consumption: best (most expensive) product per customer
+    # without ever holding the full Cartesian product.
+    best = None
+    for pairs in cross_join_chunks(customers, product, chunk_rows=50_000):
+        top = pairs.loc[pairs.groupby('CustomerID')['ListPrice'].idxmax()]
+        best = top if best is None else pd.concat([best, top])
+    best = best.loc[best.groupby('CustomerID')['ListPrice'].idxmax()]
+    print(best.head())
+
+    expected = pd.merge(customers, product, how='cross')
+    print("Chunks match pd.merge(how='cross'):",
+          expected.equals(pd.concat(cross_join_chunks(customers, product, 30_000))))
+    try:
+        cross_join(customers, product, max_rows=100_000)
+    except CrossJoinTooLarge as err:
+        print("Guard:", err)
@@ -0,0 +1,140 @@
+# ------------------------------------------------------------
+# Local stand-in for the OpenAI chat completions endpoint
+# ------------------------------------------------------------
+# Lets the transformation assistant (transformbatch.py, openaidemo.py)
+# run offline and under test: no API key, no network, deterministic
+# answers. It answers
+#     POST /v1/chat/completions
+# with the same JSON layout the API returns, choosing the code with the
+# same rules as transformcache.StubClient.
+#
+#     from fakecompletion import FakeCompletionServer
+#     with FakeCompletionServer(latency=0.5) as server:
+#         client = ChatHTTPClient(server.base_url, api_key='test')
+#         # or openai.OpenAI(base_url=server.base_url, api_key='test')
+#
+# max_concurrent > 0 makes the server answer 429 (with Retry-After)
+# when more requests than that are in flight, like a rate-limited key.
+# ------------------------------------------------------------
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from transformcache import StubClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):      # keep test output quiet
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+
+        if self.path.rstrip('/') != '/v1/chat/completions':
+            self._send(404, {'error': {'message': 'unknown endpoint', 'type': 'invalid_request_error'}})
+            return
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self._send(401, {'error': {'message': 'No API key provided', 'type': 'invalid_request_error'}})
+            return
+        try:
+            request = json.loads(raw)
+            model, messages = request['model'], request['messages']
+        except (ValueError, KeyError):
+            self._send(400, {'error': {'message': 'bad request body', 'type': 'invalid_request_error'}})
+            return
+
+        with server.lock:
+            server.request_count += 1
+            if server.max_concurrent and server.in_flight >= server.max_concurrent:
+                server.throttled_count += 1
+                self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                           {'Retry-After': '0.2'})
+                return
+            server.in_flight += 1
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            reply = server.stub.chat.completions.create(model=model, messages=messages)
+            content = reply.choices[0].message.content
+            self._send(200, {
+                'id': f"chatcmpl-fake-{server.request_count}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'prompt_tokens': sum(len(m['content']) // 4 for m in messages),
+                          'completion_tokens': len(content) // 4,
+                          'total_tokens': 0},
+            })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class FakeCompletionServer:
+    """Threaded HTTP server on 127.0.0.1 (random free port) serving stub completions."""
+
+    def __init__(self, latency=0.0, max_concurrent=0, rules=None):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.lock = threading.Lock()
+        self._httpd.latency = latency
+        self._httpd.max_concurrent = max_concurrent
+        self._httpd.stub = StubClient(rules=rules)
+        self._httpd.in_flight = 0
+        self._httpd.request_count = 0
+        self._httpd.throttled_count = 0
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def request_count(self):
+        return self._httpd.request_count
+
+    @property
+    def throttled_count(self):
+        return self._httpd.throttled_count
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    with FakeCompletionServer() as server:
+        print(f"Fake chat completions on {server.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,218 @@
+# ------------------------------------------------------------
+# Local stand-in for the Polygon.io aggregates endpoint
+# ------------------------------------------------------------
+# Lets the Polygon helpers (polygonfetch.py and friends) run offline:
+# no API key, no network, deterministic prices. It answers
+#     GET /v2/aggs/ticker/{ticker}/range/{mult}/{timespan}/{from}/{to}
+# with the same JSON layout Polygon returns: one bar per weekday for
+# timespan=day, or bars every `mult` minutes of the 14:30-21:00 UTC
+# session for timespan=minute/hour. Like Polygon, at most `limit` bars
+# come back per response, with a `next_url` cursor for the rest.
+#
+#     from fakepolygon import FakePolygonServer
+#     with FakePolygonServer(max_requests_per_second=20) as server:
+#         client = PolygonClient(api_key='test', base_url=server.base_url)
+#         ...
+#
+# max_requests_per_second > 0 makes the server answer 429 (with a
+# Retry-After header) when it is called too fast, like the free tier.
+# ------------------------------------------------------------
+
+import json
+import threading
+import time
+import zlib
+from functools import lru_cache
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Polygon stamps daily bars at midnight New York time; 05:00 UTC is
+# close enough for a stand-in and avoids daylight-saving bookkeeping.
+_BAR_HOUR_UTC = 5
+# Regular session in UTC (09:30-16:00 New York, ignoring DST)
+_SESSION_UTC = (14 * 60 + 30, 21 * 60)
+_MINUTES = {'minute': 1, 'hour': 60}
+DEFAULT_LIMIT = 5000
+MAX_LIMIT = 50000
+
+
+def _bar(seed, base, n, stamp):
+    # smooth-ish, reproducible price path per ticker
+    drift = ((n * 2654435761 + seed) % 1000) / 1000 - 0.5
+    close = round(base * (1 + 0.0005 * (n % 365)) + 5 * drift, 4)
+    open_ = round(close - drift, 4)
+    return {
+        'v': float(1_000_000 + (n * 7919 + seed) % 500_000),
+        'vw': round((open_ + close) / 2, 4),
+        'o': open_,
+        'c': close,
+        'h': round(max(open_, close) + 1, 4),
+        'l': round(min(open_, close) - 1, 4),
+        't': int(stamp.timestamp() * 1000),
+        'n': 10_000 + n % 5000,
+    }
+
+
+def fake_bars(ticker, start, end, multiplier=1, timespan='day'):
+    """Deterministic bars (Polygon 'results' dicts) for weekdays in [start, end]."""
+    start = date.fromisoformat(str(start))
+    end = date.fromisoformat(str(end))
+    if timespan != 'day' and timespan not in _MINUTES:
+        raise ValueError(f"unsupported timespan {timespan!r}")
+    seed = zlib.crc32(ticker.encode('utf-8'))
+    base = 50 + seed % 400
+    bars = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+            if timespan == 'day':
+                bars.append(_bar(seed, base, day.toordinal(),
+                                 midnight + timedelta(hours=_BAR_HOUR_UTC)))
+            else:
+                step = _MINUTES[timespan] * int(multiplier)
+                for minute in range(_SESSION_UTC[0], _SESSION_UTC[1], step):
+                    bars.append(_bar(seed, base, day.toordinal() * 1440 + minute,
+                                     midnight + timedelta(minutes=minute)))
+        day += timedelta(days=1)
+    return bars
+
+
+@lru_cache(maxsize=32)
+def _cached_bars(ticker, start, end, multiplier, timespan):
+    # Paging re-requests the same range once per page; build it once.
+    return tuple(fake_bars(ticker, start, end, multiplier, timespan))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):      # keep test output quiet
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        query = parse_qs(url.query)
+
+        with server.lock:
+            server.request_count += 1
+            now = time.monotonic()
+            if server.max_rps > 0:
+                server.recent = [t for t in server.recent if now - t < 1.0]
+                if len(server.recent) >= server.max_rps:
+                    server.throttled_count += 1
+                    self._send(429, {'status': 'ERROR', 'error': 'exceeded the maximum requests per second'},
+                               {'Retry-After': '1'})
+                    return
+                server.recent.append(now)
+
+        # v2/aggs/ticker/{ticker}/range/{mult}/{timespan}/{from}/{to}
+        if len(parts) != 9 or parts[:3] != ['v2', 'aggs', 'ticker'] or parts[4] != 'range':
+            self._send(404, {'status': 'NOT_FOUND', 'message': 'unknown endpoint'})
+            return
+        if 'apiKey' not in query and 'Authorization' not in self.headers:
+            self._send(401, {'status': 'ERROR', 'error': 'API Key was not provided'})
+            return
+
+        ticker, multiplier, timespan, start, end = parts[3], parts[5], parts[6], parts[7], parts[8]
+        if ticker in server.unknown_tickers:
+            self._send(200, {'ticker': ticker, 'status': 'OK', 'queryCount': 0,
+                             'resultsCount': 0, 'adjusted': True})
+            return
+        if server.latency:
+            time.sleep(server.latency)
+
+        try:
+            results = _cached_bars(ticker, start, end, multiplier, timespan)
+        except ValueError as err:
+            self._send(400, {'status': 'ERROR', 'error': str(err)})
+            return
+        if query.get('sort', ['asc'])[0] == 'desc':
+            results = results[::-1]
+
+        # Page through the results: cursor = offset of the first bar
+        limit = min(int(query.get('limit', [DEFAULT_LIMIT])[0]), MAX_LIMIT)
+        offset = int(query.get('cursor', ['0'])[0])
+        page = results[offset:offset + limit]
+        payload = {
+            'ticker': ticker,
+            'queryCount': len(results),
+            'resultsCount': len(page),
+            'adjusted': True,
+            'results': list(page),
+            'status': 'OK',
+            'request_id': f"fake-{server.request_count}",
+            'count': len(page),
+        }
+        if offset + limit < len(results):
+            # like Polygon, next_url carries the cursor but not the apiKey
+            keep = {k: v[0] for k, v in query.items() if k not in ('apiKey', 'cursor')}
+            keep['cursor'] = str(offset + limit)
+            payload['next_url'] = (f"http://{self.headers['Host']}{url.path}?"
+                                   + '&'.join(f"{k}={v}" for k, v in keep.items()))
+        self._send(200, payload)
+
+
+class FakePolygonServer:
+    """Threaded HTTP server on 127.0.0.1 (random free port) serving fake bars."""
+
+    def __init__(self, max_requests_per_second=0, latency=0.0, unknown_tickers=()):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.lock = threading.Lock()
+        self._httpd.max_rps = max_requests_per_second
+        self._httpd.latency = latency
+        self._httpd.unknown_tickers = set(unknown_tickers)
+        self._httpd.recent = []
+        self._httpd.request_count = 0
+        self._httpd.throttled_count = 0
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return self._httpd.request_count
+
+    @property
+    def throttled_count(self):
+        return self._httpd.throttled_count
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    with FakePolygonServer() as server:
+        print(f"Fake Polygon serving on {server.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,270 @@
+# ------------------------------------------------------------
+# Fixed-format parser for the exports' date columns
+# ------------------------------------------------------------
+# OrderDate, DueDate, ShipDate and SellStartDate are always written as
+#     2008-06-01 00:00:00.000        (or NULL)
+# yet the scripts parse them by inference: pd.to_datetime(col) guesses
+# the format, demoweek4 calls .apply(pd.to_datetime) once per value and
+# demoweek5 uses arrow.get per string.
+#
+# parse_datetimes() knows the layout instead:
+#
+#   1. the column is factorized first -- an order date repeats on every
+#      order of that day, so 10M rows are usually a few thousand distinct
+#      strings, and only those are parsed (the cache)
+#   2. the distinct strings become one fixed-width character array; the
+#      digits at fixed positions are turned into year/month/day/... with
+#      NumPy arithmetic and checked (separators, ranges, days in month)
+#   3. the epoch milliseconds are put back onto the rows with codes.take()
+#
+# NULL, '' and missing values become NaT. Anything else that does not
+# match the layout raises ValueError, or becomes NaT with errors='coerce'.
+# bytes input (e.g. np.array([...], dtype='S23') from a raw file) is
+# parsed on its bytes directly, without decoding to str.
+#
+#     from fastdates import parse_datetimes, parse_date_columns
+#     orderheader['OrderDate'] = parse_datetimes(orderheader['OrderDate'])
+#     orderheader = parse_date_columns(orderheader, ['OrderDate', 'DueDate', 'ShipDate'])
+#
+# The result is datetime64[ms], the unit salesloader uses for these columns.
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:      # pragma: no cover - optional
+    pa = None
+
+LAYOUT = 'YYYY-MM-DD HH:MM:SS.fff'
+WIDTH = len(LAYOUT)                 # 23
+
+# position -> separator character expected there
+_SEPARATORS = {4: '-', 7: '-', 10: ' ', 13: ':', 16: ':', 19: '.'}
+_DIGITS = np.array([i for i in range(WIDTH) if i not in _SEPARATORS])
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_NAT = np.iinfo(np.int64).min
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# VECTORIZED CORE
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _char_columns(values):
+    """(WIDTH + 1, n) uint8 matrix: row i holds character i of every value, 0-padded.
+
+    Row WIDTH is 0 unless the value is longer than the layout; characters
+    outside latin-1 become 255, which never matches a digit or separator.
+    """
+    if pa is not None and isinstance(values, (pa.StringArray, pa.LargeStringArray)):
+        return _arrow_char_columns(values)
+    if values.dtype.kind == 'S':
+        chars = values.astype(f'S{WIDTH + 1}').view(np.uint8)
+    else:
+        chars = np.minimum(np.asarray(values, dtype=f'U{WIDTH + 1}').view(np.uint32), 255).astype(np.uint8)
+    return np.ascontiguousarray(chars.reshape(len(values), WIDTH + 1).T)
+
+
+def _arrow_char_columns(values):
+    # Straight from the Arrow string buffers: value i is data[offset[i]:offset[i+1]].
+    offsets = np.frombuffer(values.buffers()[1], dtype=np.int64 if pa.types.is_large_string(values.type)
+                            else np.int32)[values.offset:values.offset + len(values) + 1]
+    data = values.buffers()[2]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+    n = len(values)
+    chars = np.zeros((WIDTH + 1, n), dtype=np.uint8)
+    if n and offsets[-1] - offsets[0] == n * WIDTH and (np.diff(offsets) == WIDTH).all():
+        # the usual case: every value has the layout's length, so the
+        # bytes are already a packed n x WIDTH block
+        chars[:WIDTH] = data[offsets[0]:offsets[-1]].reshape(n, WIDTH).T
+    else:
+        starts, lengths = offsets[:-1].astype(np.int64), np.diff(offsets).astype(np.int64)
+        for pos in range(WIDTH + 1):
+            inside = lengths > pos
+            chars[pos, inside] = data[starts[inside] + pos]
+    if values.null_count:
+        chars[:, values.is_null().to_numpy(zero_copy_only=False)] = 0
+    return chars
+
+
+def _number(digits, start, stop):
+    out = digits[start].astype(np.int64)
+    for i in range(start + 1, stop):
+        out = out * 10 + digits[i]
+    return out
+
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 for proleptic Gregorian dates (H. Hinnant's algorithm)."""
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _parse_fixed(chars):
+    """Epoch milliseconds for each column of a character matrix, and a validity mask."""
+    digits = chars.astype(np.int16) - ord('0')
+    valid = (chars[WIDTH - 1] != 0) & (chars[WIDTH] == 0)
+    valid &= ((digits[_DIGITS] >= 0) & (digits[_DIGITS] <= 9)).all(axis=0)
+    for pos, sep in _SEPARATORS.items():
+        valid &= chars[pos] == ord(sep)
+
+    year, month, day = _number(digits, 0, 4), _number(digits, 5, 7), _number(digits, 8, 10)
+    hour, minute = _number(digits, 11, 13), _number(digits, 14, 16)
+    second, milli = _number(digits, 17, 19), _number(digits, 20, 23)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_ok = (month >= 1) & (month <= 12)
+    days_in_month = _DAYS_IN_MONTH[np.where(month_ok, month, 0)] + (leap & (month == 2))
+    valid &= month_ok & (day >= 1) & (day <= days_in_month)
+    valid &= (hour < 24) & (minute < 60) & (second < 60)
+
+    days = _days_from_civil(year, month, day)
+    ms = ((days * 24 + hour) * 60 + minute) * 60_000 + second * 1000 + milli
+    return np.where(valid, ms, _NAT), valid
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PUBLIC API
+# ───────────────────────────────────────────────────────────────────────────────
+
+_NULL = np.array([ord(c) for c in 'NULL'] + [0])
+
+
+def _as_strings(uniques):
+    """The distinct values as an Arrow string array or a NumPy S/U array."""
+    if pa is not None and isinstance(getattr(uniques, 'array', None), pd.arrays.ArrowStringArray):
+        strings = pa.array(uniques.array)
+        return strings.combine_chunks() if isinstance(strings, pa.ChunkedArray) else strings
+    uniques = np.asarray(uniques)
+    if uniques.dtype.kind in 'SU':
+        return uniques
+    missing = pd.isna(uniques)
+    kinds = {type(v) for v in uniques[~missing]}
+    if not kinds <= {str} and not kinds <= {bytes}:
+        raise TypeError(f"expected str or bytes values, got {sorted(k.__name__ for k in kinds)}")
+    is_bytes = bytes in kinds
+    uniques = np.where(missing, b'' if is_bytes else '', uniques)     # '' parses as NaT
+    return np.array(uniques.tolist(), dtype=bytes if is_bytes else str)
+
+
+def _parse_distinct(uniques, errors):
+    """Epoch ms for each string (the distinct ones, when caching); NULL/'' → NaT."""
+    uniques = _as_strings(uniques)
+    chars = _char_columns(uniques)
+    nulls = (chars[0] == 0) | (chars[:len(_NULL)] == _NULL[:, None]).all(axis=0)
+    ms, valid = _parse_fixed(chars)
+    bad = ~valid & ~nulls
+    if bad.any() and errors == 'raise':
+        value = uniques[int(bad.argmax())]
+        value = value.as_py() if hasattr(value, 'as_py') else value.item()
+        raise ValueError(f"{value!r} does not match {LAYOUT} ({bad.sum():,} distinct bad values)")
+    return ms
+
+
+def parse_datetimes(values, errors='raise', cache=True):
+    """Parse 'YYYY-MM-DD HH:MM:SS.fff' strings (or bytes) into datetime64[ms].
+
+    Accepts a Series (the result is a Series with the same index and
+    name), an array or a list. NULL, '' and missing values are NaT;
+    values that do not match the layout raise ValueError, or become NaT
+    with errors='coerce'. With cache=True each distinct string is parsed
+    only once; cache=False skips the factorize and parses every row,
+    which is quicker when nearly all values are distinct.
+    """
+    if errors not in ('raise', 'coerce'):
+        raise ValueError("errors must be 'raise' or 'coerce'")
+    series = values if isinstance(values, pd.Series) else None
+    if series is not None and pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.astype('datetime64[ms]')
+
+    values = values if series is not None else np.asarray(values)
+    if cache:
+        # factorize = the per-call cache: codes per row, each distinct string once
+        codes, uniques = pd.factorize(values)
+        # code -1 (missing value) picks the trailing NaT
+        result = np.append(_parse_distinct(uniques, errors), _NAT).take(codes)
+    else:
+        result = _parse_distinct(values, errors)
+    result = result.view('datetime64[ms]')
+    if series is not None:
+        return pd.Series(result, index=series.index, name=series.name)
+    return result
+
+
+def parse_date_columns(df, columns, errors='raise', cache=True):
+    """Copy of `df` with every column in `columns` parsed by parse_datetimes.
+
+    The columns share one factorization, so a date that appears as both
+    OrderDate and ShipDate is parsed once.
+    """
+    columns = [col for col in columns if not pd.api.types.is_datetime64_any_dtype(df[col].dtype)]
+    out = df.copy(deep=False)
+    if not columns:
+        return out
+    stacked = pd.concat([df[col] for col in columns], ignore_index=True)
+    parsed = parse_datetimes(stacked, errors=errors, cache=cache).to_numpy()
+    for i, col in enumerate(columns):
+        out[col] = pd.Series(parsed[i * len(df):(i + 1) * len(df)], index=df.index, name=col)
+    return out
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from salesloader import DATE_FORMAT
+
+    parser = argparse.ArgumentParser(description="Benchmark fixed-format date parsing.")
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--distinct-days', type=int, default=4_000)
+    parser.add_argument('--apply-sample', type=int, default=20_000,
+                        help="rows timed for .apply(pd.to_datetime), then extrapolated")
+    args = parser.parse_args()
+
+    # OrderDate-like column: few thousand distinct days, midnight times, 1% NULL
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2005-01-01', periods=args.distinct_days, freq='D')
+    labels = np.array(days.strftime('%Y-%m-%d %H:%M:%S.000').tolist() + ['NULL'], dtype=object)
+    pick = rng.integers(0, len(days), args.rows)
+    pick[rng.random(args.rows) < 0.01] = len(days)
+    column = pd.Series(labels[pick], dtype='str')
+    print(f"{args.rows:,} rows, {len(labels):,} distinct strings")
+
+    def timed(label, func, rows=args.rows):
+        t0 = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - t0) * args.rows / rows
+        note = '' if rows == args.rows else f"  (extrapolated from {rows:,} rows)"
+        print(f"  {label:<42} {elapsed:8.2f}s{note}")
+        return result, elapsed
+
+    fast, t_fast = timed("parse_datetimes", lambda: parse_datetimes(column))
+    nulls_as_nat = column.where(column != 'NULL')
+    inferred, t_infer = timed("pd.to_datetime (inferred format)",
+                              lambda: pd.to_datetime(nulls_as_nat))
+    explicit, _ = timed("pd.to_datetime(format=DATE_FORMAT)",
+                        lambda: pd.to_datetime(nulls_as_nat, format=DATE_FORMAT))
+    sample = nulls_as_nat.head(args.apply_sample)
+    timed(".apply(pd.to_datetime) (demoweek4)", lambda: sample.apply(pd.to_datetime),
+          rows=len(sample))
+    print(f"  same values as inference: {fast.equals(inferred.astype('datetime64[ms]'))}, "
+          f"as format=: {fast.equals(explicit.astype('datetime64[ms]'))}; "
+          f"{t_infer / t_fast:.0f}x faster than inference")
+
+    # every string distinct: the cache does not help, the vectorized parse still does
+    unique = pd.Series(pd.date_range('2005-01-01', periods=min(args.rows, 1_000_000), freq='17s')
+                       .strftime('%Y-%m-%d %H:%M:%S.000'), dtype='str')
+    t0 = time.perf_counter()
+    parse_datetimes(unique)
+    t1 = time.perf_counter()
+    parse_datetimes(unique, cache=False)
+    t2 = time.perf_counter()
+    pd.to_datetime(unique)
+    t3 = time.perf_counter()
+    print(f"{len(unique):,} all-distinct strings: parse_datetimes {t1 - t0:.2f}s, "
+          f"cache=False {t2 - t1:.2f}s, pd.to_datetime {t3 - t2:.2f}s")
@@ -0,0 +1,193 @@
+# ------------------------------------------------------------
+# Memoized group-key factorization for repeated groupbys
+# ------------------------------------------------------------
+# The demos group the SAME frame by the SAME keys over and over:
+# orderheader by CustomerID, orderdetails by ProductID and by
+# SalesOrderID. Every df.groupby(key) hashes the key column again.
+#
+# GroupKeyCache remembers, per (frame, key columns), the integer
+# group code of every row plus the group labels. Later aggregations
+# reuse those codes, so only the first groupby pays for hashing. What
+# a hit saves is that hashing: on 2M rows a sum by one integer key goes
+# from ~20 to ~14 ms (the aggregation itself is the rest), by two keys
+# or a string key from ~70 to ~15 ms:
+#
+#     from groupcache import group_cache
+#     group_cache.agg(orderdetails, 'ProductID', TotalQty=('OrderQty', 'sum'))
+#     group_cache.agg(orderdetails, 'ProductID', AvgPrice=('UnitPrice', 'mean'))
+#     group_cache.transform(orderheader, 'CustomerID', 'TotalDue', 'sum')
+#
+# Staleness: an entry remembers the buffers behind its key columns and
+# keeps a Series view of them. With pandas Copy-on-Write (the default
+# in pandas 3, `pd.options.mode.copy_on_write = True` in 2.x) a write
+# to a key column has to copy that buffer first, so the next lookup sees
+# different buffers and recomputes. Entries also disappear when their
+# frame is garbage collected. Without Copy-on-Write, call
+# group_cache.invalidate(df) after an in-place edit of a key column.
+# ------------------------------------------------------------
+
+import weakref
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# codes  : int64 array, one group number per row (-1 = missing key)
+# index  : group labels, position i is the label of group number i
+GroupKeys = namedtuple('GroupKeys', ['codes', 'index'])
+
+
+def _as_keys(keys):
+    return (keys,) if isinstance(keys, str) else tuple(keys)
+
+
+def _buffer_token(values):
+    # NumPy columns: address of the data. Extension arrays (strings,
+    # categoricals, nullable ints): identity of the array object. The
+    # cache entry holds a view of the column, so neither can be recycled
+    # while cached.
+    if isinstance(values, np.ndarray):
+        return ('ndarray', values.__array_interface__['data'][0], values.shape, values.dtype.str)
+    return ('array', id(values), len(values))
+
+
+def factorize_keys(df, keys):
+    """Group code per row and sorted group labels for `df` grouped by `keys`."""
+    keys = _as_keys(keys)
+    if len(keys) == 1:
+        codes, uniques = pd.factorize(df[keys[0]], sort=True)
+        return GroupKeys(codes.astype('int64', copy=False), pd.Index(uniques, name=keys[0]))
+    gb = df.groupby(list(keys), sort=True, observed=True)
+    codes = gb.ngroup().fillna(-1).to_numpy(dtype='int64')
+    return GroupKeys(codes, gb.size().index)
+
+
+class GroupKeyCache:
+    """Cache of factorize_keys() results keyed by (frame identity, key columns)."""
+
+    def __init__(self):
+        self._entries = {}        # (id(df), keys) -> (tokens, held_values, GroupKeys, grouper)
+        self._finalizers = {}     # id(df) -> weakref.finalize
+        self.hits = 0
+        self.misses = 0
+
+    # ── bookkeeping ──────────────────────────────────────────────────────────
+
+    def _version(self, df, keys):
+        # Hold Series views, not raw arrays: Copy-on-Write only tracks
+        # references made through pandas objects.
+        held = tuple(df[key] for key in keys)
+        return tuple(_buffer_token(series.values) for series in held), held
+
+    def _watch(self, df):
+        frame_id = id(df)
+        if frame_id not in self._finalizers:
+            self._finalizers[frame_id] = weakref.finalize(df, self._forget, frame_id)
+
+    def _forget(self, frame_id):
+        self._finalizers.pop(frame_id, None)
+        for entry_key in [k for k in self._entries if k[0] == frame_id]:
+            del self._entries[entry_key]
+
+    def invalidate(self, df=None):
+        """Drop cached keys for `df`, or for every frame when df is None."""
+        if df is None:
+            for finalizer in list(self._finalizers.values()):
+                finalizer.detach()
+            self._finalizers.clear()
+            self._entries.clear()
+        else:
+            finalizer = self._finalizers.get(id(df))
+            if finalizer is not None:
+                finalizer.detach()
+            self._forget(id(df))
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ── lookups ──────────────────────────────────────────────────────────────
+
+    def _entry(self, df, keys):
+        keys = _as_keys(keys)
+        entry_key = (id(df), keys)
+        tokens, held = self._version(df, keys)
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry[0] == tokens:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        group_keys = factorize_keys(df, keys)
+        # built once: from_codes validates every code
+        grouper = pd.Categorical.from_codes(group_keys.codes,
+                                            categories=pd.RangeIndex(len(group_keys.index)))
+        self._watch(df)
+        entry = self._entries[entry_key] = (tokens, held, group_keys, grouper)
+        return entry
+
+    def keys_for(self, df, keys):
+        """Return the (possibly cached) GroupKeys for `df` grouped by `keys`."""
+        return self._entry(df, keys)[2]
+
+    def grouper(self, df, keys):
+        """Categorical of group numbers; pandas groups it without rehashing."""
+        return self._entry(df, keys)[3]
+
+    def groupby(self, df, keys):
+        """df.groupby() on the cached codes. Result labels are group numbers;
+        use agg()/transform() to get the real key labels back.
+
+        The key columns are left out of the grouped frame, as they are
+        when df.groupby(keys) gets column names.
+        """
+        grouper = self.grouper(df, keys)
+        # Every category occurs by construction, so observed=False is safe
+        # and lets pandas skip its unobserved-category filtering.
+        return df.drop(columns=list(_as_keys(keys))).groupby(grouper, observed=False, sort=True)
+
+    def agg(self, df, keys, *args, **kwargs):
+        """Same as df.groupby(keys).agg(...), reusing the cached codes."""
+        result = self.groupby(df, keys).agg(*args, **kwargs)
+        index = self.keys_for(df, keys).index
+        result.index = index.take(np.asarray(result.index, dtype='int64'))
+        return result
+
+    def transform(self, df, keys, column, func):
+        """Same as df.groupby(keys)[column].transform(func), row-aligned."""
+        return self.groupby(df, keys)[column].transform(func)
+
+    def size(self, df, keys):
+        """Rows per group, labelled by key (missing keys excluded)."""
+        codes, index = self.keys_for(df, keys)
+        counts = np.bincount(codes[codes >= 0], minlength=len(index))
+        return pd.Series(counts, index=index, name='size')
+
+
+# Shared instance for interactive use
+group_cache = GroupKeyCache()
+
+
+if __name__ == '__main__':
+    import time
+
+    from salesloader import load_table
+
+    orderdetails = load_table('orderdetails')
+    orderdetails = orderdetails.iloc[np.arange(2_000_000) % len(orderdetails)].reset_index(drop=True)
+
+    def best_ms(func, repeat=5):
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t0)
+        return 1000 * min(times)
+
+    for keys in ('ProductID', ['SalesOrderID', 'ProductID'], 'rowguid'):
+        t0 = time.perf_counter()
+        group_cache.agg(orderdetails, keys, TotalQty=('OrderQty', 'sum'))
+        miss = 1000 * (time.perf_counter() - t0)
+        hit = best_ms(lambda: group_cache.agg(orderdetails, keys, TotalQty=('OrderQty', 'sum')))
+        plain = best_ms(lambda: orderdetails.groupby(keys).agg(TotalQty=('OrderQty', 'sum')))
+        print(f"{str(keys):<30} miss {miss:6.1f} ms   hit {hit:6.1f} ms   plain groupby {plain:6.1f} ms")
+    print(f"hits={group_cache.hits} misses={group_cache.misses}")
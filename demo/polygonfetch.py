@@ -0,0 +1,372 @@
+# ------------------------------------------------------------
+# Concurrent Polygon.io aggregates fetcher
+# ------------------------------------------------------------
+# assignments/finalassignment.py downloads each ticker one after the
+# other with a bare requests.get (new connection every time). That is
+# fine for 3 tickers; for hundreds it is minutes of waiting on the
+# network.
+#
+# PolygonClient downloads many (ticker, start, end) requests at once:
+#   * a bounded thread pool (max_workers) of keep-alive sessions, one
+#     pooled requests.Session per worker thread
+#   * a shared token bucket so the whole pool stays under the plan's
+#     requests-per-second limit
+#   * retry with exponential backoff on 429 / 5xx / connection errors,
+#     honouring the Retry-After header
+#   * follows Polygon's next_url cursor, so a range larger than `limit`
+#     bars is never silently truncated
+#   * base_url can point at fakepolygon.FakePolygonServer for offline runs
+#
+#     client = PolygonClient()                       # key from POLYGON_API_KEY
+#     frames = client.fetch_many(['AAPL', 'MSFT', 'GOOGL'],
+#                                '2022-01-01', '2023-01-01')
+#     combined_df = combine_frames(frames)
+#
+# Each frame has the same columns finalassignment builds:
+#     Open, High, Low, Close, Volume, Date, Ticker
+#
+# For long intraday ranges, iter_aggregate_pages() yields one typed
+# frame per page as it arrives and stream_aggregates() appends each
+# page to a Parquet file, so memory stays flat however many bars the
+# range holds:
+#
+#     stream_aggregates(client, 'AAPL', '2020-01-01', '2023-01-01',
+#                       'AAPL_minute.parquet', timespan='minute')
+# ------------------------------------------------------------
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from bardecode import DECODE_ERRORS, decode_aggs
+
+BASE_URL = 'https://api.polygon.io'
+AGGS_PATH = '/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{start}/{end}'
+
+# Largest page Polygon serves; fewer, bigger pages mean fewer round trips
+MAX_LIMIT = 50000
+
+# Free-tier Polygon keys are limited to 5 requests per minute; paid plans
+# are effectively unlimited. Set requests_per_second for your plan.
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Polygon's short bar field names → the names used in finalassignment
+COLUMN_NAMES = {'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'v': 'Volume', 't': 'Timestamp'}
+
+# Column order and dtypes of every bar frame this module returns; fixed so
+# that pages from one download can be appended to the same Parquet file.
+BAR_DTYPES = {
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Volume': 'float64',
+    'Date': 'datetime64[ms]',
+    'Ticker': 'str',
+}
+
+
+class PolygonError(RuntimeError):
+    """A request failed permanently (bad status, bad payload, retries exhausted)."""
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# RATE LIMITING
+# ───────────────────────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        """Block until `tokens` are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Empty the bucket for `seconds` (used when the server says 429).
+
+        Clamped rather than subtracted, so several threads hitting the same
+        429 wait `seconds` once instead of once per thread.
+        """
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = time.monotonic()
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# RESPONSE → DATAFRAME
+# ───────────────────────────────────────────────────────────────────────────────
+
+def empty_bars():
+    """Zero-row bar frame with the standard columns and dtypes."""
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in BAR_DTYPES.items()})
+
+
+def bars_to_frame(results, ticker, sort=True):
+    """Polygon 'results' list → the per-ticker frame finalassignment builds."""
+    df = pd.DataFrame(results)
+    if df.empty:
+        return empty_bars()
+    df['Date'] = pd.to_datetime(df['t'], unit='ms')
+    df = df.rename(columns=COLUMN_NAMES)
+    df['Ticker'] = ticker
+    df = df[list(BAR_DTYPES)].astype(BAR_DTYPES)
+    if sort:
+        df = df.sort_values(by='Date')
+    return df.reset_index(drop=True)
+
+
+def combine_frames(frames):
+    """Concatenate per-ticker frames and sort by Date, Ticker (as finalassignment does)."""
+    frames = [df for df in frames.values()] if isinstance(frames, dict) else list(frames)
+    if not frames:
+        return empty_bars()
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.sort_values(by=['Date', 'Ticker']).reset_index(drop=True)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# CLIENT
+# ───────────────────────────────────────────────────────────────────────────────
+
+class PolygonClient:
+    """Pooled, rate-limited, retrying client for the aggregates endpoint."""
+
+    def __init__(self, api_key=None, base_url=BASE_URL, max_workers=8,
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=None,
+                 max_retries=5, backoff=0.5, max_backoff=30.0, timeout=30.0):
+        self.api_key = api_key or os.environ.get('POLYGON_API_KEY')
+        if not self.api_key:
+            raise ValueError("Pass api_key= or set the POLYGON_API_KEY environment variable")
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    # ── sessions ─────────────────────────────────────────────────────────────
+
+    def _session(self):
+        # One keep-alive session per worker thread; requests.Session is not
+        # guaranteed thread-safe, but each one pools its own connections.
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── HTTP ─────────────────────────────────────────────────────────────────
+
+    def _sleep_for(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        # exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _get(self, url, params=None):
+        """GET `url` with rate limiting and retries; return the 200 response."""
+        params = dict(params or {})
+        if 'apiKey=' not in url:
+            params.setdefault('apiKey', self.api_key)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if self.bucket is not None:
+                self.bucket.acquire()
+            response = None
+            try:
+                response = self._session().get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as err:
+                last_error = err
+            else:
+                if response.status_code == 200:
+                    return response
+                if response.status_code not in RETRY_STATUSES:
+                    raise PolygonError(f"HTTP {response.status_code} from {url}: {response.text[:200]}")
+                last_error = PolygonError(f"HTTP {response.status_code} from {url}")
+            if attempt == self.max_retries:
+                break
+            delay = self._sleep_for(attempt, response)
+            if response is not None and response.status_code == 429 and self.bucket is not None:
+                self.bucket.pause(delay)      # slow the whole pool, not just this thread
+            time.sleep(delay)
+        raise PolygonError(f"Giving up on {url} after {self.max_retries + 1} attempts") from last_error
+
+    def get_json(self, url, params=None):
+        """GET `url` with rate limiting and retries; return the decoded JSON."""
+        response = self._get(url, params)
+        try:
+            return response.json()
+        except ValueError as err:
+            raise PolygonError(f"Invalid JSON from {response.url}") from err
+
+    def aggregates_url(self, ticker, start, end, multiplier=1, timespan='day'):
+        return self.base_url + AGGS_PATH.format(ticker=ticker, multiplier=multiplier,
+                                                timespan=timespan, start=start, end=end)
+
+    def iter_aggregate_pages(self, ticker, start, end, multiplier=1, timespan='day',
+                             adjusted=True, limit=MAX_LIMIT):
+        """Yield one typed bar frame per page, following next_url to the end.
+
+        Only the current page's JSON is held in memory, and it is decoded
+        straight into column arrays by bardecode (no dict per bar).
+        """
+        url = self.aggregates_url(ticker, start, end, multiplier, timespan)
+        params = {'adjusted': str(adjusted).lower(), 'sort': 'asc', 'limit': limit}
+        while url:
+            response = self._get(url, params)
+            try:
+                frame, next_url = decode_aggs(response.content, ticker)
+            except DECODE_ERRORS as err:
+                raise PolygonError(f"Invalid aggregates payload from {response.url}") from err
+            if len(frame):
+                yield frame
+            # next_url already carries the query (minus apiKey) and the cursor
+            url = next_url
+            params = None
+
+    def fetch_aggregates(self, ticker, start, end, multiplier=1, timespan='day',
+                         adjusted=True, limit=MAX_LIMIT):
+        """Bars for one ticker and date range as a DataFrame (may be empty).
+
+        Every page is fetched, so results are never cut off at `limit`.
+        """
+        pages = list(self.iter_aggregate_pages(ticker, start, end, multiplier,
+                                               timespan, adjusted, limit))
+        if not pages:
+            return empty_bars()
+        df = pages[0] if len(pages) == 1 else pd.concat(pages, ignore_index=True)
+        return df.sort_values(by='Date').reset_index(drop=True)
+
+    def fetch_many(self, tickers, start=None, end=None, raise_errors=False, **kwargs):
+        """Fetch many requests concurrently.
+
+        tickers: ticker strings (all using start/end), or (ticker, start, end)
+            tuples for per-ticker ranges.
+        Returns {ticker: DataFrame} for tickers with data. Failures are
+        collected in self.errors ({ticker: exception}) unless raise_errors.
+        """
+        jobs = []
+        for item in tickers:
+            if isinstance(item, str):
+                if start is None or end is None:
+                    raise ValueError("start and end are required when passing plain tickers")
+                jobs.append((item, start, end))
+            else:
+                jobs.append(tuple(item))
+
+        frames = {}
+        self.errors = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.fetch_aggregates, t, s, e, **kwargs): (t, s, e)
+                       for t, s, e in jobs}
+            for future in as_completed(futures):
+                ticker = futures[future][0]
+                try:
+                    df = future.result()
+                except Exception as err:
+                    if raise_errors:
+                        raise
+                    self.errors[ticker] = err
+                    continue
+                if df.empty:
+                    continue
+                if ticker in frames:       # several ranges for one ticker
+                    df = pd.concat([frames[ticker], df]).sort_values('Date').reset_index(drop=True)
+                frames[ticker] = df
+        # keep the caller's ticker order
+        order = list(dict.fromkeys(job[0] for job in jobs))
+        return {t: frames[t] for t in order if t in frames}
+
+
+def stream_aggregates(client, ticker, start, end, path, **kwargs):
+    """Append every page for one ticker/range to the Parquet file `path`.
+
+    Pages are written as row groups as they arrive; returns the number
+    of bars written. kwargs go to PolygonClient.iter_aggregate_pages.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(col, pa.string() if col == 'Ticker'
+                          else pa.timestamp('ms') if col == 'Date'
+                          else pa.float64())
+                         for col in BAR_DTYPES])
+    rows = 0
+    tmp = path + '.tmp'
+    with pq.ParquetWriter(tmp, schema) as writer:
+        for page in client.iter_aggregate_pages(ticker, start, end, **kwargs):
+            writer.write_table(pa.Table.from_pandas(page, schema=schema, preserve_index=False))
+            rows += len(page)
+    os.replace(tmp, path)
+    return rows
+
+
+if __name__ == '__main__':
+    import sys
+
+    from fakepolygon import FakePolygonServer
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    tickers = [f"T{i:04d}" for i in range(n)]
+
+    # Stand-in server: 20 ms per response, throttles above 200 requests/s
+    with FakePolygonServer(max_requests_per_second=200, latency=0.02) as server:
+        with PolygonClient(api_key='test', base_url=server.base_url,
+                           max_workers=32, requests_per_second=150) as client:
+            t0 = time.perf_counter()
+            frames = client.fetch_many(tickers, '2022-01-01', '2023-01-01')
+            elapsed = time.perf_counter() - t0
+        combined_df = combine_frames(frames)
+        print(f"{len(frames)} tickers, {len(combined_df):,} bars in {elapsed:.2f}s "
+              f"({server.request_count} requests, {server.throttled_count} throttled, "
+              f"{len(client.errors)} errors)")
@@ -0,0 +1,260 @@
+# ------------------------------------------------------------
+# Persistent dates × tickers close-price matrix on a memory map
+# ------------------------------------------------------------
+# finalassignment.py pivots combined_df into price_df every run and
+# keeps the whole thing in memory. PriceMatrix stores the same wide
+# table on disk so it can be opened instantly and read lazily:
+#
+#     <root>/values.f8     float64, column-major (one ticker per column),
+#                          `capacity` rows per column, NaN = no price
+#     <root>/dates.npy     datetime64[ns] row labels (their count is the
+#                          number of rows in use)
+#     <root>/tickers.json  column labels, in file order
+#
+# Column-major means one ticker is one contiguous run of the file, so
+#     pm.column('AAPL')       is an O(1) view that only touches AAPL's pages
+#     pm.to_frame(['AAPL', 'MSFT'])   wraps views without copying
+# Each column has spare rows (capacity) so appending new dates writes
+# into them in place; the file is only rewritten when the capacity runs
+# out, and then doubles, so appends are amortized O(new rows).
+#
+#     pm = PriceMatrix.from_frame('price_matrix', price_df)
+#     pm = PriceMatrix('price_matrix')             # read-only reopen
+#     pm = PriceMatrix('price_matrix', mode='r+')
+#     pm.append(new_price_rows)                     # new dates (and tickers)
+# ------------------------------------------------------------
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+VALUES_FILE = 'values.f8'
+DATES_FILE = 'dates.npy'
+TICKERS_FILE = 'tickers.json'
+ITEMSIZE = np.dtype('float64').itemsize
+MIN_CAPACITY = 256
+
+
+def _replace_file(path, write):
+    tmp = path + '.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_dates(path, dates):
+    def write(tmp):
+        with open(tmp, 'wb') as fh:
+            np.save(fh, np.asarray(dates, dtype='datetime64[ns]'))
+    _replace_file(path, write)
+
+
+def _write_tickers(path, tickers):
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(list(tickers), fh)
+    _replace_file(path, write)
+
+
+class PriceMatrix:
+    """Memory-mapped wide close-price table with append support."""
+
+    def __init__(self, root, mode='r'):
+        if mode not in ('r', 'r+'):
+            raise ValueError("mode must be 'r' or 'r+'")
+        self.root = root
+        self.mode = mode
+        self._load()
+
+    # ── files ────────────────────────────────────────────────────────────────
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _load(self):
+        with open(self._path(TICKERS_FILE), 'r', encoding='utf-8') as fh:
+            self.tickers = pd.Index(json.load(fh), name='Ticker')
+        self.dates = pd.DatetimeIndex(np.load(self._path(DATES_FILE)), name='Date')
+        size = os.path.getsize(self._path(VALUES_FILE))
+        k = len(self.tickers)
+        self.capacity = size // (ITEMSIZE * k) if k else 0
+        if k and self.capacity:
+            self._values = np.memmap(self._path(VALUES_FILE), dtype='float64', mode=self.mode,
+                                     shape=(self.capacity, k), order='F')
+        else:
+            self._values = np.empty((self.capacity, k), dtype='float64', order='F')
+        self._positions = {t: i for i, t in enumerate(self.tickers)}
+
+    @classmethod
+    def create(cls, root, dates, tickers, values=None, capacity=None):
+        """Write a new matrix; `values` is (len(dates), len(tickers)) or None for all-NaN."""
+        os.makedirs(root, exist_ok=True)
+        n, k = len(dates), len(tickers)
+        # leave room to append into: next power of two above the rows in use
+        capacity = max(capacity or 1 << max(n - 1, 0).bit_length(), n, MIN_CAPACITY)
+        path = os.path.join(root, VALUES_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.truncate(capacity * k * ITEMSIZE)
+        if k:
+            mm = np.memmap(tmp, dtype='float64', mode='r+', shape=(capacity, k), order='F')
+            mm[:] = np.nan
+            if values is not None:
+                mm[:n] = values
+            mm.flush()
+            del mm
+        os.replace(tmp, path)
+        _write_tickers(os.path.join(root, TICKERS_FILE), tickers)
+        _write_dates(os.path.join(root, DATES_FILE), dates)
+        return cls(root, mode='r+')
+
+    @classmethod
+    def from_frame(cls, root, price_df, capacity=None):
+        """Store a wide frame (index = Date, columns = tickers), sorted by date."""
+        price_df = price_df.sort_index()
+        return cls.create(root, price_df.index, [str(c) for c in price_df.columns],
+                          price_df.to_numpy(dtype='float64'), capacity)
+
+    def flush(self):
+        if isinstance(self._values, np.memmap):
+            self._values.flush()
+
+    # ── reads ────────────────────────────────────────────────────────────────
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.tickers)
+
+    @property
+    def values(self):
+        """(dates × tickers) view of the rows in use; column-major, no copy."""
+        return self._values[:len(self.dates)]
+
+    def column(self, ticker):
+        """One ticker's prices as a contiguous view."""
+        return self._values[:len(self.dates), self._positions[ticker]]
+
+    def series(self, ticker):
+        return pd.Series(self.column(ticker), index=self.dates, name=ticker, copy=False)
+
+    def to_frame(self, tickers=None, start=None, end=None):
+        """Wide DataFrame over the memory map.
+
+        Without `tickers` (or with a contiguous run of them) the frame
+        wraps the mapped array without copying; an arbitrary selection
+        reads just those columns.
+        """
+        rows = slice(None)
+        if start is not None or end is not None:
+            rows = self.dates.slice_indexer(start, end)
+        dates = self.dates[rows]
+        if tickers is None:
+            block, columns = self.values[rows], self.tickers
+        else:
+            pos = np.array([self._positions[t] for t in tickers], dtype=np.intp)
+            columns = self.tickers[pos]
+            if len(pos) and (np.diff(pos) == 1).all():
+                block = self.values[rows, pos[0]:pos[-1] + 1]
+            else:
+                block = self.values[rows][:, pos]
+        return pd.DataFrame(block, index=dates, columns=columns, copy=False)
+
+    # ── writes ───────────────────────────────────────────────────────────────
+
+    def _require_writable(self):
+        if self.mode != 'r+':
+            raise PermissionError("PriceMatrix opened read-only; reopen with mode='r+'")
+
+    def _resize(self, capacity, n_tickers):
+        """Rewrite values.f8 with more rows per column and/or more columns."""
+        n, k_old = len(self.dates), len(self.tickers)
+        path = self._path(VALUES_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.truncate(capacity * n_tickers * ITEMSIZE)
+        grown = np.memmap(tmp, dtype='float64', mode='r+', shape=(capacity, n_tickers), order='F')
+        grown[:] = np.nan
+        if n and k_old:
+            grown[:n, :k_old] = self._values[:n]
+        grown.flush()
+        self._values = grown
+        return tmp
+
+    def append(self, prices):
+        """Add rows for dates after the last stored one; new tickers become new columns."""
+        self._require_writable()
+        prices = prices.sort_index().dropna(how='all')
+        if prices.empty:
+            return self
+        if len(self.dates) and prices.index[0] <= self.dates[-1]:
+            raise ValueError(f"New rows must start after {self.dates[-1]}; got {prices.index[0]}")
+
+        columns = [str(c) for c in prices.columns]
+        new_tickers = [t for t in dict.fromkeys(columns) if t not in self._positions]
+        n, n_add = len(self.dates), len(prices)
+        k = len(self.tickers) + len(new_tickers)
+
+        tmp = None
+        if n + n_add > self.capacity or new_tickers:
+            capacity = self.capacity
+            while capacity < n + n_add:
+                capacity = max(2 * capacity, MIN_CAPACITY)
+            # Rewrite into a temp file even for new columns only: capacity is
+            # derived from the file size, so growing values.f8 in place
+            # would misread the layout if we crashed before tickers.json.
+            tmp = self._resize(capacity, k)
+            self.capacity = capacity
+
+        tickers = list(self.tickers) + new_tickers
+        positions = {t: i for i, t in enumerate(tickers)}
+        block = np.full((n_add, k), np.nan)
+        block[:, [positions[c] for c in columns]] = prices.to_numpy(dtype='float64')
+        self._values[n:n + n_add] = block
+        self.flush()
+
+        # values first, then the labels that make the new rows visible
+        if tmp is not None:
+            del self._values
+            os.replace(tmp, self._path(VALUES_FILE))
+        if new_tickers:
+            _write_tickers(self._path(TICKERS_FILE), tickers)
+        _write_dates(self._path(DATES_FILE), self.dates.append(pd.DatetimeIndex(prices.index)))
+        self._load()
+        return self
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    from fakepolygon import fake_bars
+    from polygonfetch import bars_to_frame, combine_frames
+
+    tickers = [f"T{i:04d}" for i in range(2000)]
+    combined_df = combine_frames({t: bars_to_frame(fake_bars(t, '2018-01-01', '2023-01-31'), t)
+                                  for t in tickers})
+    price_df = combined_df.pivot(index='Date', columns='Ticker', values='Close').sort_index()
+    history, new_rows = price_df.iloc[:-10], price_df.iloc[-10:]
+    print(f"{price_df.shape[0]:,} dates × {price_df.shape[1]:,} tickers "
+          f"({price_df.memory_usage().sum() / 1e6:.0f} MB in memory)")
+
+    with tempfile.TemporaryDirectory() as root:
+        t0 = time.perf_counter()
+        PriceMatrix.from_frame(root, history)
+        t1 = time.perf_counter()
+        PriceMatrix(root, mode='r+').append(new_rows)
+        t2 = time.perf_counter()
+        pm = PriceMatrix(root)
+        aapl = pm.series('T0042')
+        t3 = time.perf_counter()
+        frame = pm.to_frame()
+        t4 = time.perf_counter()
+
+        print(f"  create         {1000 * (t1 - t0):8.1f} ms")
+        print(f"  append 10 rows {1000 * (t2 - t1):8.1f} ms")
+        print(f"  open + column  {1000 * (t3 - t2):8.1f} ms")
+        print(f"  to_frame       {1000 * (t4 - t3):8.1f} ms   "
+              f"zero-copy={np.shares_memory(frame.to_numpy(), pm.values)}")
+        print("  round trip equal:", frame.equals(price_df.rename_axis(columns='Ticker')),
+              "  column equal:", np.array_equal(aapl, price_df['T0042'], equal_nan=True))
@@ -0,0 +1,194 @@
+# ------------------------------------------------------------
+# Incremental returns / moving-average / monthly / correlation state
+# ------------------------------------------------------------
+# finalassignment.py recomputes everything from the full price_df on
+# every run:
+#     returns_df     = price_df.pct_change() * 100
+#     ma20_df        = price_df.rolling(window=20).mean()
+#     monthly_avg_df = price_df.resample('M').mean()
+#     corr_matrix    = returns_df.corr()
+# so a nightly refresh costs time proportional to the whole history.
+#
+# IncrementalPriceAnalytics keeps just enough state to extend those
+# results when new daily rows arrive:
+#   * the last price row            → returns of the new rows
+#   * the last (window-1) price rows → rolling means of the new rows
+#   * per-(month, ticker) sum/count → monthly means
+#   * per-pair sums of returns (n, Σx, Σx², Σxy over rows where both
+#     tickers have a return)        → the pairwise-complete correlation
+# so append() costs O(new rows), and monthly_mean()/corr() only depend
+# on the number of months and tickers, not on the history length.
+#
+#     stats = IncrementalPriceAnalytics(window=20)
+#     stats.append(price_df)                 # first load: full history
+#     stats.save('price_stats.pkl')
+#     ...next night...
+#     stats = IncrementalPriceAnalytics.load('price_stats.pkl')
+#     new = stats.append(todays_price_rows)  # only the new dates
+#     new['returns'], new['ma'], stats.monthly_mean(), stats.corr()
+# ------------------------------------------------------------
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+
+class IncrementalPriceAnalytics:
+    """Running state for returns, rolling mean, monthly mean and correlation."""
+
+    def __init__(self, window=20):
+        self.window = window
+        self.tickers = []
+        self._tail = None            # last window-1 price rows (wide)
+        self._month_sum = None       # DataFrame: month Period × ticker
+        self._month_count = None
+        # pairwise return sums, all k × k; entry [i, j] uses rows where
+        # both ticker i and ticker j have a return
+        self._n = np.zeros((0, 0))
+        self._sx = np.zeros((0, 0))   # Σ x_i     over those rows
+        self._sxx = np.zeros((0, 0))  # Σ x_i²
+        self._sxy = np.zeros((0, 0))  # Σ x_i x_j
+        self.last_date = None
+
+    # ── state helpers ────────────────────────────────────────────────────────
+
+    def _add_tickers(self, columns):
+        new = [c for c in columns if c not in self.tickers]
+        if not new:
+            return
+        k_old = len(self.tickers)
+        self.tickers.extend(new)
+        k = len(self.tickers)
+        for name in ('_n', '_sx', '_sxx', '_sxy'):
+            grown = np.zeros((k, k))
+            grown[:k_old, :k_old] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def _update_corr_sums(self, returns):
+        x = returns.to_numpy(dtype='float64')
+        present = ~np.isnan(x)
+        m = present.astype('float64')
+        x = np.where(present, x, 0.0)
+        self._n += m.T @ m
+        self._sx += x.T @ m            # [i, j]: Σ x_i where j also present
+        self._sxx += (x * x).T @ m
+        self._sxy += x.T @ x
+
+    def _update_months(self, prices):
+        months = prices.index.to_period('M')
+        sums = prices.groupby(months).sum(min_count=1)
+        counts = prices.notna().groupby(months).sum()
+        if self._month_sum is None:
+            self._month_sum, self._month_count = sums, counts
+        else:
+            self._month_sum = self._month_sum.add(sums, fill_value=0)
+            self._month_count = self._month_count.add(counts, fill_value=0)
+
+    # ── public API ───────────────────────────────────────────────────────────
+
+    def append(self, prices):
+        """Add new price rows (index = Date, columns = tickers).
+
+        Rows must be newer than anything appended before. Returns a dict
+        with the new rows' 'returns' (percent, like returns_df) and 'ma'
+        (rolling mean, like ma20_df).
+        """
+        prices = prices.sort_index().dropna(how='all')
+        if prices.empty:
+            return {'returns': prices.copy(), 'ma': prices.copy()}
+        if self.last_date is not None and prices.index[0] <= self.last_date:
+            raise ValueError(f"New rows must start after {self.last_date}; got {prices.index[0]}")
+
+        self._add_tickers(prices.columns)
+        prices = prices.reindex(columns=self.tickers)
+
+        # Previous rows + new rows is enough context for pct_change/rolling
+        context = prices if self._tail is None else pd.concat(
+            [self._tail.reindex(columns=self.tickers), prices])
+        n_new = len(prices)
+
+        returns = (context.pct_change(fill_method=None) * 100).iloc[-n_new:]
+        if self._tail is None:
+            returns = returns.iloc[1:]           # first row has no previous price
+        ma = context.rolling(window=self.window).mean().iloc[-n_new:]
+
+        self._update_corr_sums(returns)
+        self._update_months(prices)
+        self._tail = context.iloc[-max(self.window - 1, 1):]
+        self.last_date = prices.index[-1]
+        return {'returns': returns.dropna(how='all'), 'ma': ma}
+
+    def monthly_mean(self):
+        """Same as price_df.resample('M').mean() over everything appended."""
+        if self._month_sum is None:
+            return pd.DataFrame(columns=self.tickers)
+        means = self._month_sum / self._month_count.where(self._month_count > 0)
+        # resample includes empty months and labels each by its last day
+        full = pd.period_range(means.index.min(), means.index.max(), freq='M')
+        means = means.reindex(full)
+        means.index = full.to_timestamp(how='end').normalize()
+        means.index.name = self._tail.index.name
+        return means[self.tickers]
+
+    def corr(self, min_periods=1):
+        """Pairwise-complete correlation of returns, like returns_df.corr()."""
+        n = self._n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * self._sxy - self._sx * self._sx.T
+            var_i = n * self._sxx - self._sx ** 2
+            var_j = var_i.T
+            result = cov / np.sqrt(var_i * var_j)
+        result = np.clip(result, -1.0, 1.0)
+        result[(n < max(min_periods, 2))] = np.nan
+        np.fill_diagonal(result, np.where(np.diag(n) >= max(min_periods, 2), 1.0, np.nan))
+        return pd.DataFrame(result, index=self.tickers, columns=self.tickers)
+
+    # ── persistence ──────────────────────────────────────────────────────────
+
+    def save(self, path):
+        with open(path, 'wb') as fh:
+            pickle.dump(self.__dict__, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        obj = cls.__new__(cls)
+        with open(path, 'rb') as fh:
+            obj.__dict__.update(pickle.load(fh))
+        return obj
+
+
+if __name__ == '__main__':
+    import time
+
+    from fakepolygon import fake_bars
+    from polygonfetch import bars_to_frame, combine_frames
+
+    tickers = [f"T{i:03d}" for i in range(200)]
+    frames = {t: bars_to_frame(fake_bars(t, '2015-01-01', '2023-01-31'), t) for t in tickers}
+    combined_df = combine_frames(frames)
+    price_df = combined_df.pivot(index='Date', columns='Ticker', values='Close').sort_index()
+    history, new_rows = price_df.iloc[:-5], price_df.iloc[-5:]
+
+    t0 = time.perf_counter()
+    full_returns = price_df.pct_change(fill_method=None) * 100
+    full_ma = price_df.rolling(window=20).mean()
+    full_monthly = price_df.resample('ME').mean()
+    full_corr = full_returns.corr()
+    t1 = time.perf_counter()
+
+    stats = IncrementalPriceAnalytics(window=20)
+    stats.append(history)
+    t2 = time.perf_counter()
+    new = stats.append(new_rows)
+    monthly = stats.monthly_mean()
+    corr = stats.corr()
+    t3 = time.perf_counter()
+
+    print(f"{price_df.shape[0]:,} dates × {price_df.shape[1]} tickers")
+    print(f"  full recompute        {1000 * (t1 - t0):8.1f} ms")
+    print(f"  incremental (5 rows)  {1000 * (t3 - t2):8.1f} ms")
+    print("  returns match:", np.allclose(new['returns'], full_returns.iloc[-5:], equal_nan=True))
+    print("  MA20 match:   ", np.allclose(new['ma'], full_ma.iloc[-5:], equal_nan=True))
+    print("  monthly match:", np.allclose(monthly, full_monthly, equal_nan=True))
+    print("  corr match:   ", np.allclose(corr, full_corr, equal_nan=True, atol=1e-9))
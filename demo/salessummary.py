@@ -0,0 +1,115 @@
+# ------------------------------------------------------------
+# Single-pass sales summaries for orderdetails
+# ------------------------------------------------------------
+# demo/week2/demoweek2.py groups orderdetails by ProductID five times
+# (mean UnitPrice, the mean/max/min trio, OrderQty sum, LineTotal sum,
+# the top-5 sort) and by SalesOrderID for nunique, then joins the
+# pieces back together. Each groupby hashes the key column again.
+#
+# Here the key is factorized ONCE into a Categorical; pandas groups a
+# categorical by its integer codes directly, so every aggregation
+# below reuses that single factorization:
+#
+#     from salessummary import product_sales_summary, grouped_value_counts
+#     summary = product_sales_summary(orderdetails)
+#     top_5   = summary.nsmallest(5, 'SalesRank')
+#     qty_mix = grouped_value_counts(orderdetails, 'ProductID', 'OrderQty')
+# ------------------------------------------------------------
+
+import pandas as pd
+
+# Column name demoweek2 uses for "distinct values of the other key"
+_DISTINCT_NAME = {
+    'ProductID': 'UniqueProductCount',
+    'SalesOrderID': 'UniqueOrderCount',
+}
+
+
+def make_grouper(df, key):
+    """Factorize `df[key]` once and return it as a Categorical grouper.
+
+    Missing keys get code -1 and are left out of every group, like
+    groupby(dropna=True).
+    """
+    codes, uniques = pd.factorize(df[key], sort=True)
+    return pd.Categorical.from_codes(codes, categories=uniques)
+
+
+def _groupby(df, key, grouper):
+    if grouper is None:
+        grouper = make_grouper(df, key)
+    # Named after the key so the result index reads 'ProductID', etc.
+    return df.groupby(pd.Series(grouper, index=df.index, name=key),
+                      observed=True, sort=True)
+
+
+def sales_summary(orderdetails, key='ProductID', grouper=None):
+    """One row per `key` with every demoweek2 metric.
+
+    Columns:
+        Avg_UnitPrice, Max_UnitPrice, Min_UnitPrice,
+        Total_OrderQty, Total_LineTotal, Lines,
+        Unique<Other>Count   distinct SalesOrderID (or ProductID) per key
+        Top_OrderQty         most frequent OrderQty in the group
+        Top_OrderQty_Count   how often it occurs
+        SalesRank            1 = highest Total_LineTotal
+    """
+    other = 'SalesOrderID' if key == 'ProductID' else 'ProductID'
+    gb = _groupby(orderdetails, key, grouper)
+
+    summary = gb.agg(
+        Avg_UnitPrice=('UnitPrice', 'mean'),
+        Max_UnitPrice=('UnitPrice', 'max'),
+        Min_UnitPrice=('UnitPrice', 'min'),
+        Total_OrderQty=('OrderQty', 'sum'),
+        Total_LineTotal=('LineTotal', 'sum'),
+        Lines=('OrderQty', 'size'),
+        **{_DISTINCT_NAME[other]: (other, 'nunique')},
+    )
+
+    # value_counts on the same GroupBy object: keep each group's most
+    # frequent OrderQty (ties → smallest quantity, as value_counts sorts).
+    counts = gb['OrderQty'].value_counts().rename('Count').reset_index()
+    counts = counts.sort_values([key, 'Count', 'OrderQty'],
+                                ascending=[True, False, True], kind='stable')
+    top = counts.drop_duplicates(key).set_index(key)
+    summary['Top_OrderQty'] = top['OrderQty']
+    summary['Top_OrderQty_Count'] = top['Count']
+
+    summary['SalesRank'] = (summary['Total_LineTotal']
+                            .rank(method='first', ascending=False)
+                            .astype('int64'))
+    summary.index = summary.index.astype(orderdetails[key].dtype)
+    return summary
+
+
+def product_sales_summary(orderdetails, grouper=None):
+    """sales_summary() keyed by ProductID."""
+    return sales_summary(orderdetails, 'ProductID', grouper)
+
+
+def order_sales_summary(orderdetails, grouper=None):
+    """sales_summary() keyed by SalesOrderID."""
+    return sales_summary(orderdetails, 'SalesOrderID', grouper)
+
+
+def grouped_value_counts(df, key, column, grouper=None):
+    """Long frame of (key, column, Frequency), like demoweek2's value_counts."""
+    gb = _groupby(df, key, grouper)
+    out = gb[column].value_counts().rename('Frequency').reset_index()
+    out[key] = out[key].astype(df[key].dtype)
+    return out
+
+
+if __name__ == '__main__':
+    from salesloader import load_table
+
+    orderdetails = load_table('orderdetails')
+    grouper = make_grouper(orderdetails, 'ProductID')
+
+    summary = product_sales_summary(orderdetails, grouper)
+    print("Product sales summary:\n", summary.head())
+    print("\nTop 5 products by total LineTotal:\n", summary.nsmallest(5, 'SalesRank'))
+    print("\nFrequency of OrderQty per ProductID:\n",
+          grouped_value_counts(orderdetails, 'ProductID', 'OrderQty', grouper).head(10))
+    print("\nOrder summary:\n", order_sales_summary(orderdetails).head())
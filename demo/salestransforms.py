@@ -0,0 +1,202 @@
+# ------------------------------------------------------------
+# Vectorized versions of the row-wise .apply(axis=1) transforms
+# ------------------------------------------------------------
+# demo/demoweek4.py teaches DataFrame.apply(..., axis=1) by building
+# LineTotal, DiscountedTotal, Subtotal/Tax/TotalWithTax, DaysToShip,
+# DaysLate, LineProfit and CostToPriceRatio one Python call per row.
+# That is fine for a lesson but dominates runtime on millions of lines.
+#
+# Each function below computes the same column with whole-column
+# arithmetic and returns results identical to the row-wise lambda,
+# including the edge cases:
+#   * NaN inputs give NaN (never an exception)
+#   * a missing ShipDate/DueDate gives NaN days, and IsLate False
+#   * ListPrice == 0 gives NaN for CostToPriceRatio (the lambda's None)
+#
+# Run this file directly for a side-by-side timing:
+#     python demo/salestransforms.py 1000000
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+DISCOUNT_THRESHOLD = 100     # lines above this subtotal get a discount
+DISCOUNT_RATE = 0.10         # 10% off
+TAX_RATE = 0.07              # flat 7% tax
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# ORDERDETAILS LINE AMOUNTS
+# ───────────────────────────────────────────────────────────────────────────────
+
+def line_total(orderdetails):
+    """LineTotal = UnitPrice × OrderQty."""
+    return (orderdetails['UnitPrice'] * orderdetails['OrderQty']).rename('LineTotal')
+
+
+def discounted_total(orderdetails, threshold=DISCOUNT_THRESHOLD, rate=DISCOUNT_RATE):
+    """Subtotal minus a `rate` discount on lines whose subtotal > `threshold`."""
+    subtotal = line_total(orderdetails)
+    # Same arithmetic as apply_discount(): subtotal - (rate * subtotal),
+    # so results match bit for bit. NaN > threshold is False → NaN stays NaN.
+    discount = (rate * subtotal).where(subtotal > threshold, 0)
+    return (subtotal - discount).rename('DiscountedTotal')
+
+
+def summarize_lines(orderdetails, tax_rate=TAX_RATE):
+    """Subtotal, Tax and TotalWithTax columns (what summarize_row returns per row)."""
+    subtotal = line_total(orderdetails)
+    tax = tax_rate * subtotal
+    return pd.DataFrame({
+        'Subtotal': subtotal,
+        'Tax': tax,
+        'TotalWithTax': subtotal + tax,
+    }, index=orderdetails.index)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# ORDERHEADER TIMING
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _day_diff(later, earlier):
+    # Whole days, floored like Timedelta.days; NaT on either side → NaN.
+    # Result is int64 when nothing is missing and float64 otherwise,
+    # which is what the row-wise lambda's ints/None produce.
+    later = pd.to_datetime(later, errors='coerce')
+    earlier = pd.to_datetime(earlier, errors='coerce')
+    return (later - earlier).dt.days
+
+
+def days_to_ship(orderheader):
+    """DaysToShip = ShipDate − OrderDate in days (NaN if either is missing)."""
+    return _day_diff(orderheader['ShipDate'], orderheader['OrderDate']).rename('DaysToShip')
+
+
+def days_late(orderheader):
+    """DaysLate = ShipDate − DueDate in days (NaN if either is missing)."""
+    return _day_diff(orderheader['ShipDate'], orderheader['DueDate']).rename('DaysLate')
+
+
+def is_late(days):
+    """True where DaysLate > 0; missing values are not late."""
+    return (days > 0).rename('IsLate')
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PRODUCT PROFITABILITY
+# ───────────────────────────────────────────────────────────────────────────────
+
+def line_profit(merged):
+    """(ListPrice − StandardCost) × OrderQty on orderdetails merged with product."""
+    return ((merged['ListPrice'] - merged['StandardCost']) * merged['OrderQty']).rename('LineProfit')
+
+
+def cost_to_price_ratio(product):
+    """StandardCost / ListPrice, NaN where ListPrice is 0 (instead of ±inf)."""
+    list_price = product['ListPrice'].astype('float64')
+    return (product['StandardCost'] / list_price.where(list_price != 0)).rename('CostToPriceRatio')
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# ROW-WISE REFERENCES (copied from demoweek4) AND BENCHMARK
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _apply_discount(row):
+    subtotal = row['UnitPrice'] * row['OrderQty']
+    discount = 0.10 * subtotal if subtotal > 100 else 0
+    return subtotal - discount
+
+
+def _summarize_row(row):
+    subtotal = row['UnitPrice'] * row['OrderQty']
+    tax = 0.07 * subtotal
+    return pd.Series({'Subtotal': subtotal, 'Tax': tax, 'TotalWithTax': subtotal + tax})
+
+
+ROWWISE = {
+    'LineTotal': lambda od, oh, mg, pr: od.apply(
+        lambda row: row['UnitPrice'] * row['OrderQty'], axis=1),
+    'DiscountedTotal': lambda od, oh, mg, pr: od.apply(_apply_discount, axis=1),
+    'Subtotal/Tax/TotalWithTax': lambda od, oh, mg, pr: od.apply(_summarize_row, axis=1),
+    'DaysToShip': lambda od, oh, mg, pr: oh.apply(
+        lambda r: (r['ShipDate'] - r['OrderDate']).days
+                  if pd.notna(r.get('ShipDate')) and pd.notna(r.get('OrderDate'))
+                  else None,
+        axis=1),
+    'DaysLate': lambda od, oh, mg, pr: oh.apply(
+        lambda r: (r['ShipDate'] - r['DueDate']).days
+                  if pd.notna(r.get('ShipDate')) and pd.notna(r.get('DueDate'))
+                  else None,
+        axis=1),
+    'LineProfit': lambda od, oh, mg, pr: mg.apply(
+        lambda r: (r['ListPrice'] - r['StandardCost']) * r['OrderQty'], axis=1),
+    'CostToPriceRatio': lambda od, oh, mg, pr: pr.apply(
+        lambda r: (r['StandardCost'] / r['ListPrice'])
+                  if (isinstance(r['StandardCost'], (int, float)) and
+                      isinstance(r['ListPrice'], (int, float)) and
+                      r['ListPrice'] != 0)
+                  else None,
+        axis=1),
+}
+
+VECTORIZED = {
+    'LineTotal': lambda od, oh, mg, pr: line_total(od),
+    'DiscountedTotal': lambda od, oh, mg, pr: discounted_total(od),
+    'Subtotal/Tax/TotalWithTax': lambda od, oh, mg, pr: summarize_lines(od),
+    'DaysToShip': lambda od, oh, mg, pr: days_to_ship(oh),
+    'DaysLate': lambda od, oh, mg, pr: days_late(oh),
+    'LineProfit': lambda od, oh, mg, pr: line_profit(mg),
+    'CostToPriceRatio': lambda od, oh, mg, pr: cost_to_price_ratio(pr),
+}
+
+
+def _scale(df, n_rows, seed=0):
+    # Resample rows with replacement to reach n_rows (keeps real value mix)
+    rng = np.random.default_rng(seed)
+    return df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+
+
+def benchmark(n_rows=100_000, repeat=1):
+    """Time row-wise apply vs the vectorized functions; returns a DataFrame."""
+    import time
+    from salesloader import load_table
+
+    od = _scale(load_table('orderdetails'), n_rows)
+    oh = _scale(load_table('orderheader'), n_rows)
+    pr = _scale(load_table('product'), n_rows)
+    mg = od.merge(load_table('product')[['ProductID', 'StandardCost', 'ListPrice']],
+                  on='ProductID', how='left')
+
+    rows = []
+    for name in VECTORIZED:
+        timings = {}
+        results = {}
+        for label, impl in (('apply', ROWWISE[name]), ('vectorized', VECTORIZED[name])):
+            best = float('inf')
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                results[label] = impl(od, oh, mg, pr)
+                best = min(best, time.perf_counter() - t0)
+            timings[label] = best
+        expected = results['apply']
+        got = results['vectorized']
+        if isinstance(expected, pd.Series):
+            got = got.rename(expected.name)
+        same = np.array_equal(expected.astype('float64').to_numpy(),
+                              got.astype('float64').to_numpy(), equal_nan=True)
+        rows.append({
+            'transform': name,
+            'apply_s': round(timings['apply'], 4),
+            'vectorized_s': round(timings['vectorized'], 4),
+            'speedup': round(timings['apply'] / max(timings['vectorized'], 1e-9), 1),
+            'identical': same,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    import sys
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"Row-wise apply vs vectorized on {n:,} rows per table:")
+    print(benchmark(n).to_string(index=False))
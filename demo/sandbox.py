@@ -0,0 +1,275 @@
+# ------------------------------------------------------------
+# Run generated DataFrame code in a resource-limited worker process
+# ------------------------------------------------------------
+# openaidemo.py exec()s whatever the model sent back inside the main
+# process. A snippet with a Python row loop or an accidental cross join
+# can then pin a core forever or take all the host's memory.
+#
+# run_sandboxed() runs the snippet (compiled by transformfunc's
+# Transformation) in a separate process instead:
+#
+#   * the input frame is written once as Arrow IPC into shared memory;
+#     the worker maps it without a pickled copy
+#   * the worker caps its own address space (RLIMIT_AS, `memory_mb` on
+#     top of what the interpreter + pandas already use; Linux only, as
+#     it reads the baseline from /proc) and CPU time
+#   * the parent kills the worker after `timeout` seconds of wall clock
+#   * the result comes back as Arrow IPC in a second shared block that is
+#     `max_output_bytes` big, so a result over the limit cannot be written;
+#     the parent makes one memcpy of it before the block is unlinked
+#
+#     result = run_sandboxed(generated_code, df, timeout=10, memory_mb=512)
+#     result = run_sandboxed(transform, df)          # a Transformation works too
+#
+# Failures raise SandboxTimeout, SandboxLimitExceeded or SandboxError
+# (the snippet's own exception, with its traceback text).
+#
+# Workers are started with 'spawn' so they never inherit locks or threads
+# from the caller; that costs a few hundred ms of start-up per call.
+# ------------------------------------------------------------
+
+import multiprocessing as mp
+import os
+import sys
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import pyarrow as pa
+
+try:
+    import resource
+except ImportError:       # pragma: no cover - not available on Windows
+    resource = None
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MEMORY_MB = 1024
+DEFAULT_MAX_OUTPUT_ROWS = 10_000_000
+DEFAULT_MAX_OUTPUT_BYTES = 512 * 1024 * 1024
+STARTUP_TIMEOUT = 60.0
+
+
+class SandboxError(RuntimeError):
+    """The sandboxed code failed; str() includes the worker's traceback."""
+
+
+class SandboxTimeout(SandboxError):
+    """The worker ran past its wall-clock limit and was killed."""
+
+
+class SandboxLimitExceeded(SandboxError):
+    """The worker hit its memory or CPU limit, or its result was too large."""
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# ARROW IPC <-> SHARED MEMORY
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _ipc_size(table):
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.size()
+
+
+def _write_ipc(table, buf):
+    with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(buf)), table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_ipc(buf, size, copy=False):
+    # copy=True: one memcpy into Arrow-owned memory, for when the shared
+    # block is about to be unlinked and nothing may keep pointing into it
+    data = pa.py_buffer(bytes(buf[:size]) if copy else buf[:size])
+    return pa.ipc.open_stream(data).read_all()
+
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # frames made from the mapping still point into it; the mapping
+        # goes away with the process instead
+        pass
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# WORKER
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _address_space():
+    """Current virtual size in bytes, or None without /proc (macOS, BSD)."""
+    try:
+        with open('/proc/self/status', 'r') as fh:
+            for line in fh:
+                if line.startswith('VmSize:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _apply_limits(memory_mb, cpu_seconds):
+    if resource is None:
+        return
+    # RLIMIT_AS needs the current size as a baseline; getrusage only has
+    # the peak RSS, far below it, so without /proc the cap is skipped and
+    # only the CPU limit and the parent's timeout apply
+    base = _address_space() if memory_mb else None
+    if base is not None:
+        # on top of what the interpreter, pandas and the mapped input already take
+        limit = base + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_seconds) + 1, int(cpu_seconds) + 1))
+
+
+def _worker(conn, code, name, in_name, in_size, out_name, out_capacity, limits):
+    """Child process: read input, run the snippet, write the result."""
+    shm_in = shm_out = None
+    try:
+        from transformfunc import Transformation
+
+        shm_in = shared_memory.SharedMemory(name=in_name)
+        df = _read_ipc(shm_in.buf, in_size).to_pandas()
+        # attach the output before the limits: the mapping is sized to the
+        # output limit and would otherwise eat into memory_mb
+        shm_out = shared_memory.SharedMemory(name=out_name)
+        transform = Transformation(code, name)
+        _apply_limits(limits['memory_mb'], limits['timeout'])
+
+        conn.send(('running', None))
+        start = time.perf_counter()
+        result = transform(df)
+        elapsed = time.perf_counter() - start
+        del df
+
+        if len(result) > limits['max_output_rows']:
+            conn.send(('limit', f"result has {len(result):,} rows; limit is {limits['max_output_rows']:,}"))
+            return
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        size = _ipc_size(table)
+        if size > out_capacity:
+            conn.send(('limit', f"result is {size:,} bytes; limit is {out_capacity:,}"))
+            return
+        _write_ipc(table, shm_out.buf)
+        conn.send(('ok', (size, elapsed)))
+    except MemoryError:
+        conn.send(('limit', f"memory limit of {limits['memory_mb']} MB exceeded"))
+    except BaseException:
+        conn.send(('error', traceback.format_exc()))
+    finally:
+        for shm in (shm_in, shm_out):
+            if shm is not None:
+                _close(shm)
+        conn.close()
+        # Exit without running destructors: frames that still point into
+        # the input mapping would make SharedMemory.__del__ complain.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(0)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PUBLIC API
+# ───────────────────────────────────────────────────────────────────────────────
+
+def run_sandboxed(code, df, timeout=DEFAULT_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB,
+                  max_output_rows=DEFAULT_MAX_OUTPUT_ROWS, max_output_bytes=DEFAULT_MAX_OUTPUT_BYTES,
+                  name='transform', return_stats=False):
+    """Run a generated snippet (or Transformation) on `df` in a limited worker process.
+
+    Returns the transformed DataFrame, or (frame, stats) with
+    return_stats=True, where stats has 'elapsed' (the snippet itself),
+    'wall' (including process start-up) and 'output_bytes'.
+    """
+    if hasattr(code, 'code'):            # a transformfunc.Transformation
+        code, name = code.code, code.name
+    wall_start = time.perf_counter()
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    in_size = _ipc_size(table)
+    shm_in = shared_memory.SharedMemory(create=True, size=max(in_size, 1))
+    # sized to the output limit up front; shared memory pages are only
+    # allocated when written, so an unused limit costs nothing
+    shm_out = shared_memory.SharedMemory(create=True, size=max(max_output_bytes, 1))
+    ctx = mp.get_context('spawn')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    limits = {'timeout': timeout, 'memory_mb': memory_mb, 'max_output_rows': max_output_rows}
+    process = None
+    try:
+        _write_ipc(table, shm_in.buf)
+        del table
+        process = ctx.Process(target=_worker, daemon=True,
+                              args=(child_conn, code, name, shm_in.name, in_size,
+                                    shm_out.name, max_output_bytes, limits))
+        process.start()
+        child_conn.close()
+
+        def receive(wait):
+            if not parent_conn.poll(wait):
+                raise SandboxTimeout(f"{name!r} did not finish within {timeout}s")
+            try:
+                return parent_conn.recv()
+            except EOFError:
+                process.join(1)
+                raise SandboxLimitExceeded(
+                    f"{name!r} worker died (exit code {process.exitcode}); "
+                    "usually the CPU or memory limit") from None
+
+        # start-up (imports, reading the input) is not counted against
+        # the snippet; the clock starts when the worker says 'running'
+        status, payload = receive(STARTUP_TIMEOUT)
+        if status == 'running':
+            status, payload = receive(timeout)
+
+        if status == 'limit':
+            raise SandboxLimitExceeded(f"{name!r}: {payload}")
+        if status == 'error':
+            raise SandboxError(f"{name!r} raised:\n{payload}")
+        size, elapsed = payload
+        result = _read_ipc(shm_out.buf, size, copy=True).to_pandas()
+    finally:
+        if process is not None and process.is_alive():
+            process.kill()
+        if process is not None:
+            process.join()
+        parent_conn.close()
+        for shm in (shm_in, shm_out):
+            _close(shm)
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                # Python < 3.13 unlinks the segment itself when a worker's
+                # attach fails, even though the worker did not create it
+                pass
+
+    if return_stats:
+        return result, {'elapsed': elapsed, 'wall': time.perf_counter() - wall_start,
+                        'output_bytes': size}
+    return result
+
+
+if __name__ == '__main__':
+    from salesloader import read_csv_table
+
+    df = read_csv_table('orderdetails')
+    snippets = {
+        'linetotal': "df_transformed = df.copy()\n"
+                     "df_transformed['LineTotal'] = df_transformed['OrderQty'] * df_transformed['UnitPrice']",
+        'row loop': "while True:\n    for i in range(len(df)):\n        pass",
+        'cross join': "df_transformed = df.merge(df, how='cross').merge(df, how='cross')",
+        'big output': "df_transformed = pd.concat([df] * 2000, ignore_index=True)",
+        'bug': "df_transformed = df['NoSuchColumn'] + 1",
+    }
+    for label, code in snippets.items():
+        t0 = time.perf_counter()
+        try:
+            result, stats = run_sandboxed(code, df, timeout=3, memory_mb=256,
+                                          max_output_bytes=16 * 1024 * 1024, name=label,
+                                          return_stats=True)
+            outcome = f"ok, {result.shape}, snippet {1000 * stats['elapsed']:.1f} ms"
+        except SandboxError as err:
+            outcome = f"{type(err).__name__}: {str(err).splitlines()[-1][:70]}"
+        print(f"  {label:<11} {time.perf_counter() - t0:5.1f}s  {outcome}")
+    print(f"  host process still fine, pid {os.getpid()}")
@@ -0,0 +1,201 @@
+# ------------------------------------------------------------
+# Sum pivots on categorical codes, dense or sparse
+# ------------------------------------------------------------
+# demoweek3b.py builds
+#     sales.pivot_table(index='ProductCategoryID', columns='Color',
+#                       values='LineTotal', aggfunc='sum', fill_value=0)
+# and melts it back. pivot_table groups, then unstacks into a dense
+# rows × columns grid -- fine for categories × colors, but for
+# ProductID × CustomerID almost every cell is an empty 0 and the grid
+# alone can be larger than memory.
+#
+# pivot_sum() factorizes both axes once and adds every value into its
+# cell with one np.bincount over the flattened cell number. The result
+# can be
+#     output='dense'   a DataFrame equal to pivot_table(..., fill_value=0)
+#     output='sparse'  the same DataFrame with Sparse[float64, 0] columns
+#     output='scipy'   SparsePivot(csr_matrix, index, columns)
+# The sparse outputs never allocate the full grid: only the occupied
+# cells are found (np.unique of the cell numbers) and summed.
+#
+#     wide = pivot_sum(sales, 'ProductCategoryID', 'Color', 'LineTotal')
+#     sp = pivot_sum(sales, 'ProductID', 'CustomerID', 'LineTotal', output='scipy')
+#     long = melt_nonzero(sp, value_name='TotalSales')     # only non-zero cells
+#
+# SciPy is only needed for the sparse outputs.
+# ------------------------------------------------------------
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import scipy.sparse as sps
+except ImportError:      # pragma: no cover - optional
+    sps = None
+
+AGGFUNCS = ('sum', 'count', 'mean')
+OUTPUTS = ('dense', 'sparse', 'scipy')
+DEFAULT_MAX_DENSE_CELLS = 50_000_000
+
+SparsePivot = namedtuple('SparsePivot', ['matrix', 'index', 'columns'])
+
+
+def _codes(series):
+    """(codes, labels) sorted like pivot_table; -1 for missing keys."""
+    codes, labels = pd.factorize(series, sort=True)
+    return codes, pd.Index(labels, name=series.name)
+
+
+def _require_scipy():
+    if sps is None:
+        raise ImportError("output='sparse'/'scipy' needs SciPy (pip install scipy)")
+
+
+def pivot_sum(df, index, columns, values, aggfunc='sum', output='dense',
+              fill_value=0, max_dense_cells=DEFAULT_MAX_DENSE_CELLS):
+    """pivot_table(index=, columns=, values=, aggfunc=) via one bincount.
+
+    Rows whose index or column key is missing are dropped (as pivot_table
+    does); missing values count as 0 in a sum and are skipped by
+    count/mean. For a mean, an index or column label with no values at
+    all is left out, as pivot_table drops its all-NaN rows and columns.
+    Empty cells are `fill_value` in the dense output and implicit zeros
+    in the sparse ones.
+    """
+    if aggfunc not in AGGFUNCS:
+        raise ValueError(f"aggfunc must be one of {AGGFUNCS}")
+    if output not in OUTPUTS:
+        raise ValueError(f"output must be one of {OUTPUTS}")
+
+    keys = df[[index, columns]].notna().all(axis=1)
+    if aggfunc == 'mean':
+        # a label whose values are all missing has no mean anywhere
+        keys &= df[values].notna()
+    if not keys.all():
+        df = df[keys]
+    row_codes, row_labels = _codes(df[index])
+    col_codes, col_labels = _codes(df[columns])
+    vals = df[values].to_numpy(dtype='float64', na_value=np.nan)
+    present = ~np.isnan(vals)
+    n_rows, n_cols = len(row_labels), len(col_labels)
+    cell = row_codes.astype(np.int64) * n_cols + col_codes
+
+    if output == 'dense':
+        if n_rows * n_cols > max_dense_cells:
+            raise ValueError(f"dense pivot would have {n_rows:,} x {n_cols:,} cells; "
+                             "use output='sparse' or 'scipy'")
+        n_cells = n_rows * n_cols
+        result, counts = _aggregate(cell, vals, present, aggfunc, n_cells)
+        result = np.where(counts > 0, result, fill_value)
+        if aggfunc == 'count':
+            result = result.astype(np.int64)
+        return pd.DataFrame(result.reshape(n_rows, n_cols), index=row_labels, columns=col_labels)
+
+    _require_scipy()
+    # only the occupied cells: renumber them 0..k-1, then the same bincount
+    occupied, inverse = np.unique(cell, return_inverse=True)
+    result, _ = _aggregate(inverse, vals, present, aggfunc, len(occupied))
+    matrix = sps.csr_matrix((result, (occupied // n_cols, occupied % n_cols)), shape=(n_rows, n_cols))
+    matrix.eliminate_zeros()
+    if output == 'scipy':
+        return SparsePivot(matrix, row_labels, col_labels)
+    return _sparse_frame(matrix, row_labels, col_labels)
+
+
+def _aggregate(cell, vals, present, aggfunc, n_cells):
+    """(per-cell result, per-cell count of non-missing values)."""
+    counts = np.bincount(cell, weights=present, minlength=n_cells)
+    if aggfunc == 'count':
+        return counts, counts
+    sums = np.bincount(cell, weights=np.where(present, vals, 0.0), minlength=n_cells)
+    if aggfunc == 'sum':
+        return sums, counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts, counts
+
+
+def _sparse_frame(matrix, index, columns):
+    # DataFrame.sparse.from_spmatrix makes float columns with a NaN fill
+    # value, so the empty cells would read as NaN; SparseArray.from_spmatrix
+    # on one column at a time keeps 0 as the fill value.
+    csc = matrix.tocsc()
+    arrays = {label: pd.arrays.SparseArray.from_spmatrix(csc[:, [j]])
+              for j, label in enumerate(columns)}
+    frame = pd.DataFrame(arrays, index=index)
+    frame.columns.name = columns.name
+    return frame
+
+
+def melt_nonzero(pivot, index_name=None, var_name=None, value_name='value'):
+    """Long (index, column, value) rows for the non-zero, non-NaN cells only.
+
+    Accepts a SparsePivot, a sparse-backed DataFrame or an ordinary wide
+    DataFrame; rows come out sorted by index then column, like
+    pivot.stack() without the zeros.
+    """
+    if isinstance(pivot, SparsePivot):
+        coo = pivot.matrix.tocoo()
+        rows, cols, data = coo.row, coo.col, coo.data
+        index, columns = pivot.index, pivot.columns
+    elif all(isinstance(dtype, pd.SparseDtype) for dtype in pivot.dtypes) and pivot.shape[1]:
+        _require_scipy()
+        coo = pivot.sparse.to_coo()
+        rows, cols, data = coo.row, coo.col, coo.data
+        index, columns = pivot.index, pivot.columns
+    else:
+        values = pivot.to_numpy(dtype='float64')
+        rows, cols = np.nonzero(np.nan_to_num(values, nan=0.0))
+        data = values[rows, cols]
+        index, columns = pivot.index, pivot.columns
+    keep = (data != 0) & ~np.isnan(data)
+    rows, cols, data = rows[keep], cols[keep], data[keep]
+    order = np.lexsort((cols, rows))
+    rows, cols, data = rows[order], cols[order], data[order]
+    return pd.DataFrame({
+        index_name or index.name or 'index': index.take(rows),
+        var_name or columns.name or 'variable': columns.take(cols),
+        value_name: data,
+    })
+
+
+if __name__ == '__main__':
+    import time
+
+    from salesloader import load_table
+
+    orders = load_table('orderdetails')
+    products = load_table('product')
+    sales = orders.merge(products[['ProductID', 'Color', 'ProductCategoryID']], on='ProductID', how='left')
+    sales['Color'] = sales['Color'].astype('str').where(sales['Color'].notna(), 'No Color')
+    sales['LineTotal'] = sales['LineTotal'].astype('float64')
+
+    expected = sales.pivot_table(index='ProductCategoryID', columns='Color', values='LineTotal',
+                                 aggfunc='sum', fill_value=0)
+    got = pivot_sum(sales, 'ProductCategoryID', 'Color', 'LineTotal')
+    print("category x color equals pivot_table:",
+          np.allclose(got.to_numpy(), expected.to_numpy()) and got.index.equals(expected.index)
+          and list(got.columns) == list(expected.columns))
+
+    # High-cardinality case: ProductID x CustomerID on synthetic rows
+    rng = np.random.default_rng(0)
+    n = 2_000_000
+    big = pd.DataFrame({'ProductID': rng.zipf(1.3, n) % 20_000,
+                        'CustomerID': rng.integers(0, 5_000, n),
+                        'LineTotal': rng.gamma(2.0, 50.0, n)})
+    t0 = time.perf_counter()
+    sp = pivot_sum(big, 'ProductID', 'CustomerID', 'LineTotal', output='scipy')
+    t1 = time.perf_counter()
+    long = melt_nonzero(sp, value_name='TotalSales')
+    t2 = time.perf_counter()
+    check = big.groupby(['ProductID', 'CustomerID'])['LineTotal'].sum().reset_index()
+    t3 = time.perf_counter()
+    dense_mb = sp.matrix.shape[0] * sp.matrix.shape[1] * 8 / 1e6
+    sparse_mb = (sp.matrix.data.nbytes + sp.matrix.indices.nbytes + sp.matrix.indptr.nbytes) / 1e6
+    print(f"{n:,} rows -> {sp.matrix.shape[0]:,} x {sp.matrix.shape[1]:,} pivot, "
+          f"{sp.matrix.nnz:,} non-zero cells")
+    print(f"  pivot_sum(scipy)  {t1 - t0:6.2f}s   {sparse_mb:7.1f} MB (dense grid would be {dense_mb:,.0f} MB)")
+    print(f"  melt_nonzero      {t2 - t1:6.2f}s")
+    print(f"  groupby.sum check {t3 - t2:6.2f}s   same cells: "
+          f"{np.allclose(long['TotalSales'], check['LineTotal']) and len(long) == len(check)}")
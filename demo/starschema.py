@@ -0,0 +1,169 @@
+# ------------------------------------------------------------
+# Indexed star-schema lookups: orderdetails → orderheader / product / customers
+# ------------------------------------------------------------
+# assignments/week5.py and demo/demoweek4.py join the tables with
+# pd.merge on SalesOrderID, ProductID and CustomerID. Every merge
+# builds a new hash table over the key and copies every column of
+# both sides, even when only one or two attributes are needed.
+#
+# SalesStarSchema indexes each dimension key ONCE (a pandas Index,
+# whose hash engine is built on first use and then reused) and turns
+# every later "join" into:
+#     positions = dim_index.get_indexer(fact_keys)     # one probe per row
+#     value     = take(dim_column, positions)          # gather
+# for just the columns you ask for. Facts can be fed in chunks, so a
+# very large orderdetails never has to be in memory at once:
+#
+#     star = SalesStarSchema.from_exampledata()
+#     lines = star.enrich(orderdetails, product=['Name', 'ListPrice'],
+#                         customers=['CompanyName'])
+#     for chunk in star.enrich_chunks(pd.read_csv(..., chunksize=1_000_000),
+#                                     product=['StandardCost']):
+#         ...
+# ------------------------------------------------------------
+
+import pandas as pd
+from pandas.api.extensions import take
+
+# dimension table → its primary key
+DIMENSION_KEYS = {
+    'orderheader': 'SalesOrderID',
+    'product': 'ProductID',
+    'customers': 'CustomerID',
+}
+
+# dimensions reached through another one when the fact lacks their key
+# (orderdetails has no CustomerID: go through orderheader.SalesOrderID)
+VIA = {
+    'customers': 'orderheader',
+}
+
+
+class SalesStarSchema:
+    """Dimension tables indexed once for repeated fact → dimension lookups."""
+
+    def __init__(self, orderheader=None, product=None, customers=None):
+        self._dims = {}
+        self._index = {}
+        for name, table in (('orderheader', orderheader),
+                            ('product', product),
+                            ('customers', customers)):
+            if table is not None:
+                self.add_dimension(name, table)
+
+    @classmethod
+    def from_exampledata(cls, data_dir=None):
+        """Build the schema from the (cached) exampledata tables."""
+        from salesloader import load_table
+        return cls(orderheader=load_table('orderheader', data_dir),
+                   product=load_table('product', data_dir),
+                   customers=load_table('customers', data_dir))
+
+    def add_dimension(self, name, table):
+        """Register (or replace) a dimension table and index its key."""
+        if name not in DIMENSION_KEYS:
+            raise KeyError(f"Unknown dimension {name!r}; expected one of {sorted(DIMENSION_KEYS)}")
+        key = DIMENSION_KEYS[name]
+        index = pd.Index(table[key])
+        if not index.is_unique:
+            dupes = index[index.duplicated()].unique()[:5].tolist()
+            raise ValueError(f"{name}.{key} must be unique to act as a dimension key; "
+                             f"duplicates include {dupes}")
+        self._dims[name] = table
+        self._index[name] = index
+
+    # ───────────────────────────────────────────────────────────────────────
+    # LOOKUPS
+    # ───────────────────────────────────────────────────────────────────────
+
+    def positions(self, fact, dimension):
+        """Row position in `dimension` for every fact row (-1 = no match)."""
+        if dimension not in self._dims:
+            raise KeyError(f"Dimension {dimension!r} has not been added")
+        key = DIMENSION_KEYS[dimension]
+        if key in fact.columns:
+            keys = fact[key]
+        elif dimension in VIA:
+            # e.g. orderdetails → orderheader → CustomerID
+            via = VIA[dimension]
+            via_pos = self.positions(fact, via)
+            keys = take(self._dims[via][key].array, via_pos, allow_fill=True)
+        else:
+            raise KeyError(f"Fact frame has no {key!r} column to look up {dimension!r}")
+        return self._index[dimension].get_indexer(keys)
+
+    def lookup(self, fact, dimension, columns, positions=None):
+        """DataFrame of `columns` from `dimension`, row-aligned with `fact`.
+
+        Unmatched fact rows get missing values, like a left merge.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        if positions is None:
+            positions = self.positions(fact, dimension)
+        table = self._dims[dimension]
+        return pd.DataFrame(
+            {col: take(table[col].array, positions, allow_fill=True) for col in columns},
+            index=fact.index,
+        )
+
+    def enrich(self, fact, how='left', **dimension_columns):
+        """Return `fact` plus the requested dimension columns.
+
+        dimension_columns: dimension name → list of columns,
+            e.g. product=['Name', 'ListPrice'], customers=['CompanyName']
+        how: 'left' keeps every fact row; 'inner' keeps only rows that
+            matched every requested dimension.
+        """
+        if how not in ('left', 'inner'):
+            raise ValueError(f"how must be 'left' or 'inner', got {how!r}")
+        pieces = [fact]
+        keep = None
+        for dimension, columns in dimension_columns.items():
+            pos = self.positions(fact, dimension)
+            if how == 'inner':
+                matched = pos >= 0
+                keep = matched if keep is None else keep & matched
+            pieces.append(self.lookup(fact, dimension, columns, positions=pos))
+        out = pd.concat(pieces, axis=1)
+        if keep is not None:
+            out = out[keep]
+        return out
+
+    def enrich_chunks(self, fact_chunks, how='left', **dimension_columns):
+        """enrich() applied to each frame of an iterable (e.g. read_csv chunks).
+
+        Only one enriched chunk exists at a time, so memory stays bounded
+        by chunk size plus the (small) dimension tables.
+        """
+        for chunk in fact_chunks:
+            yield self.enrich(chunk, how=how, **dimension_columns)
+
+
+if __name__ == '__main__':
+    import time
+
+    import numpy as np
+
+    from salesloader import load_table
+
+    star = SalesStarSchema.from_exampledata()
+    base = load_table('orderdetails')
+    orderdetails = base.iloc[np.arange(2_000_000) % len(base)].reset_index(drop=True)
+    product = load_table('product')
+    orderheader = load_table('orderheader')
+    customers = load_table('customers')
+
+    t0 = time.perf_counter()
+    merged = (orderdetails
+              .merge(product[['ProductID', 'Name', 'ListPrice']], on='ProductID', how='left')
+              .merge(orderheader[['SalesOrderID', 'CustomerID']], on='SalesOrderID', how='left')
+              .merge(customers[['CustomerID', 'CompanyName']], on='CustomerID', how='left'))
+    t1 = time.perf_counter()
+    enriched = star.enrich(orderdetails, product=['Name', 'ListPrice'],
+                           orderheader=['CustomerID'], customers=['CompanyName'])
+    t2 = time.perf_counter()
+
+    print(f"{len(orderdetails):,} lines   pd.merge x3: {t1 - t0:.3f}s   "
+          f"star.enrich: {t2 - t1:.3f}s")
+    print("Same result:", merged.equals(enriched[merged.columns]))
@@ -0,0 +1,526 @@
+# ------------------------------------------------------------
+# Synthetic AdventureWorks-style tables at any scale
+# ------------------------------------------------------------
+# exampledata/ has ~850 customers, 32 orders, 540 order lines and 295
+# products -- too small for any timing to mean something. generate()
+# writes the same four tables at a chosen number of order lines
+# (1K ... 1B), in the same pipe-delimited, latin-1, NULL-for-missing
+# layout, so every script and salesloader can read them unchanged:
+#
+#     from syntheticsales import generate
+#     generate('/data/aw_10m', detail_rows=10_000_000, formats=('csv', 'parquet'))
+#     orderdetails = load_table('orderdetails', data_dir='/data/aw_10m')
+#
+#     python syntheticsales.py /data/aw_10m --rows 10000000 --format both
+#
+# The tables are referentially consistent: every orderdetails row points
+# at an existing order and product, every order at an existing customer,
+# and each order's SubTotal/TaxAmt/Freight/TotalDue add up its lines.
+# Popularity is skewed the way sales data is: ProductID per line and
+# CustomerID per order follow a Zipf-like power law (a few best sellers
+# and big accounts, a long tail), and order dates rise with SalesOrderID.
+#
+# Generation streams: the work is cut into shards of `chunk_rows` order
+# lines (customers: `chunk_rows` customers); worker processes build and
+# CSV-encode shards with NumPy + Arrow, and the parent appends them to
+# the files in shard order, with at most a few shards in memory at once.
+# Every shard has its own seed, so the output depends on `seed` and
+# `chunk_rows` only -- never on the number of workers.
+# ------------------------------------------------------------
+
+import io
+import math
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from salesloader import TABLES
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:      # pragma: no cover - optional
+    pq = None
+
+FORMATS = ('csv', 'parquet')
+DEFAULT_CHUNK_ROWS = 500_000
+LINES_PER_ORDER = 3.0
+ORDERS_PER_CUSTOMER = 4.0
+CUSTOMER_SKEW = 0.8          # power-law exponent of orders per customer
+PRODUCT_SKEW = 0.8           # power-law exponent of lines per product
+MAX_PRODUCTS = 100_000
+
+# first IDs, as in the AdventureWorksLT export
+ORDER_ID_BASE = 71774
+DETAIL_ID_BASE = 110562
+PRODUCT_ID_BASE = 680
+ADDRESS_ID_BASE = 400
+
+FIRST_DAY = np.datetime64('2005-07-01', 'D')
+LAST_DAY = np.datetime64('2008-06-30', 'D')
+MS_PER_DAY = 86_400_000
+
+# All generated text is ASCII, so the UTF-8 Arrow writes is also latin-1.
+FIRST_NAMES = ['Orlando', 'Keith', 'Donna', 'Janet', 'Lucy', 'Rosmarie', 'Dominic', 'Kathleen',
+               'Katherine', 'Johnny', 'Christopher', 'David', 'John', 'Jean', 'Jinghao', 'Linda',
+               'Kerim', 'Kevin', 'Mary', 'Paul', 'Rebecca', 'Ryan', 'Sean', 'Stephen', 'Tanya',
+               'Yuping', 'Andrew', 'Brian', 'Carla', 'Deepak', 'Elsa', 'Frances', 'Garth',
+               'Helen', 'Jay', 'Karen', 'Michael', 'Pamela', 'Roger', 'Shannon']
+LAST_NAMES = ['Gee', 'Harris', 'Carreras', 'Gates', 'Harrington', 'Carroll', 'Gash', 'Garza',
+              'Harding', 'Caprio', 'Beck', 'Liu', 'Kane', 'Trenary', 'Hanif', 'Mitchell', 'Hendergart',
+              'Brown', 'Dempsey', 'Alcorn', 'Laszlo', 'Calafato', 'Jacobson', 'Martin', 'Vance',
+              'Tiano', 'Cencini', 'Goldberg', 'Kumar', 'Leonetti', 'Nay', 'Fulton', 'Reinhart',
+              'Stewart', 'Walker', 'Ito', 'Zimmerman', 'Poe', 'Lopez', 'Ortiz']
+TITLES = ['Mr.', 'Ms.', 'Sr.', 'Sra.', None]
+TITLE_P = [0.45, 0.40, 0.02, 0.02, 0.11]
+SUFFIXES = [None, 'Jr.', 'Sr.', 'II', 'IV', 'PhD']
+SUFFIX_P = [0.95, 0.015, 0.01, 0.01, 0.005, 0.01]
+COMPANY_WORDS = ['Advanced', 'Progressive', 'Modular', 'Metropolitan', 'Rural', 'Coastal',
+                 'Friendly', 'Professional', 'Vigorous', 'Global', 'Urban', 'Riverside',
+                 'Eastside', 'Certified', 'Famous', 'Trusted', 'Sturdy', 'Fitness', 'Active',
+                 'Valley']
+COMPANY_KINDS = ['Bike Store', 'Sports', 'Bike Components', 'Cycle Shop', 'Sporting Goods',
+                 'Bicycle Supply', 'Bike Works', 'Outdoor Goods', 'Cycles', 'Wholesale']
+SALES_PEOPLE = ['pamela0', 'david8', 'jillian0', 'jose1', 'linda3', 'shu0', 'michael9',
+                'garrett1', 'jae0']
+SHIP_METHODS = ['CARGO TRANSPORT 5', 'XRQ - TRUCK GROUND', 'ZY - EXPRESS',
+                'OVERSEAS - DELUXE', 'OVERNIGHT J-FAST']
+SHIP_METHOD_P = [0.6, 0.15, 0.1, 0.1, 0.05]
+
+PRODUCT_LINES = [('Road Frame', 'FR'), ('Mountain Frame', 'FR'), ('Touring Frame', 'FR'),
+                 ('Road Bike', 'BK'), ('Mountain Bike', 'BK'), ('Touring Bike', 'BK'),
+                 ('Helmet', 'HL'), ('Jersey', 'LJ'), ('Shorts', 'SH'), ('Gloves', 'GL'),
+                 ('Socks', 'SO'), ('Front Wheel', 'FW'), ('Rear Wheel', 'RW'), ('Pedal', 'PD'),
+                 ('Handlebars', 'HB'), ('Seat', 'SE'), ('Tire', 'TI'), ('Bottle Cage', 'BC')]
+GRADES = ['HL', 'ML', 'LL', 'Sport-100', 'Classic', 'Racing']
+COLORS = ['Black', 'Red', 'Silver', 'Blue', 'Yellow', 'White', 'Multi', 'Grey', None]
+COLOR_P = [0.25, 0.12, 0.12, 0.1, 0.1, 0.05, 0.05, 0.03, 0.18]
+SIZES = ['38', '40', '42', '44', '46', '48', '52', '56', '58', '60', '62', 'S', 'M', 'L', 'XL', None]
+SELL_START = ['2002-06-01', '2005-07-01', '2006-07-01', '2007-07-01']
+SELL_END = ['2006-06-30', '2007-06-30']
+
+Scale = namedtuple('Scale', ['detail_rows', 'customers', 'products', 'chunk_rows'])
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# SCALE
+# ───────────────────────────────────────────────────────────────────────────────
+
+def plan_scale(detail_rows, lines_per_order=LINES_PER_ORDER, orders_per_customer=ORDERS_PER_CUSTOMER,
+               products=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Table sizes for `detail_rows` order lines.
+
+    Orders come out at about detail_rows / lines_per_order; customers
+    are sized for `orders_per_customer` orders each on average, and the
+    catalogue grows with the square root of the volume (295 products at
+    1M lines, capped at MAX_PRODUCTS) unless `products` is given.
+    """
+    if detail_rows < 1:
+        raise ValueError("detail_rows must be at least 1")
+    if lines_per_order < 1:
+        raise ValueError("lines_per_order must be at least 1")
+    orders = detail_rows / lines_per_order
+    customers = max(100, round(orders / orders_per_customer))
+    if products is None:
+        products = min(MAX_PRODUCTS, max(295, round(295 * math.sqrt(detail_rows / 1e6))))
+    return Scale(int(detail_rows), int(customers), int(products), int(chunk_rows))
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# VECTOR HELPERS
+# ───────────────────────────────────────────────────────────────────────────────
+
+_HEX = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
+# (start, stop) of the hex groups in a GUID string, 8-4-4-4-12
+_GUID_GROUPS = [(0, 8), (9, 13), (14, 18), (19, 23), (24, 36)]
+
+
+def _rng(seed, table, shard):
+    return np.random.default_rng([seed, table, shard])
+
+
+def _power_law(rng, n, skew, size):
+    """Ranks 0..n-1 with P(rank k) roughly proportional to 1 / (k + 1) ** skew.
+
+    Inverse CDF of the continuous power law on [1, n + 1), so it needs no
+    table of n probabilities however large n is.
+    """
+    u = rng.random(size)
+    if abs(skew - 1.0) < 1e-9:
+        x = np.exp(u * math.log(n + 1))
+    else:
+        a = 1.0 - skew
+        x = (1.0 + u * ((n + 1) ** a - 1.0)) ** (1.0 / a)
+    return np.minimum(x.astype(np.int64) - 1, n - 1)
+
+
+def _scatter(ranks, n, salt):
+    """Bijection rank -> position (a*rank + b mod n), so the best sellers are not IDs 1, 2, 3..."""
+    a = 2654435761 + 2 * salt
+    while math.gcd(a, n) != 1:
+        a += 2
+    return (ranks * (a % n) + 7919 * salt) % n
+
+
+def _pick(rng, choices, p, size):
+    return pa.array(choices).take(pa.array(rng.choice(len(choices), size=size, p=p)))
+
+
+def _text(values):
+    return pc.cast(pa.array(values), pa.string())
+
+
+def _padded(values, width):
+    return pc.utf8_lpad(_text(values), width, '0')
+
+
+def _join(*parts):
+    return pc.binary_join_element_wise(*parts, '')
+
+
+def _rowguids(rng, n):
+    """n random GUID strings ('89E42CDC-8506-48A2-B89B-EB3E64E3554E'), built as one byte block."""
+    raw = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16)
+    digits = np.empty((n, 32), dtype=np.uint8)
+    digits[:, 0::2] = _HEX[raw >> 4]
+    digits[:, 1::2] = _HEX[raw & 15]
+    chars = np.full((n, 36), ord('-'), dtype=np.uint8)
+    done = 0
+    for start, stop in _GUID_GROUPS:
+        chars[:, start:stop] = digits[:, done:done + stop - start]
+        done += stop - start
+    offsets = np.arange(n + 1, dtype=np.int64) * 36
+    return pa.LargeStringArray.from_buffers(n, pa.py_buffer(offsets), pa.py_buffer(chars))
+
+
+def _dates(days, mask=None):
+    ms = days.astype('datetime64[D]').astype(np.int64) * MS_PER_DAY
+    return pa.array(ms, type=pa.timestamp('ms'), mask=mask)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# TABLE SHARDS
+# ───────────────────────────────────────────────────────────────────────────────
+
+def product_table(n_products, seed=0):
+    """The product catalogue: ProductID PRODUCT_ID_BASE .. + n_products - 1."""
+    rng = _rng(seed, 0, 0)
+    ids = PRODUCT_ID_BASE + np.arange(n_products, dtype=np.int32)
+    line = rng.integers(0, len(PRODUCT_LINES), n_products)
+    grade = rng.integers(0, len(GRADES), n_products)
+    color = rng.choice(len(COLORS), size=n_products, p=COLOR_P)
+    size = rng.integers(0, len(SIZES), n_products)
+    names, numbers, seen = [], [], set()
+    for i in range(n_products):
+        kind, code = PRODUCT_LINES[line[i]]
+        name = f"{GRADES[grade[i]]} {kind}"
+        if COLORS[color[i]] is not None:
+            name += f" - {COLORS[color[i]]}"
+        if SIZES[size[i]] is not None:
+            name += f", {SIZES[size[i]]}"
+        if name in seen:            # Name is unique in the catalogue
+            name = f"{name} ({ids[i]})"
+        seen.add(name)
+        names.append(name)
+        numbers.append(f"{code}-{ids[i]:05d}" + (f"-{SIZES[size[i]]}" if SIZES[size[i]] else ''))
+    list_price = np.maximum(2.29, np.round(rng.lognormal(5.0, 1.3, n_products), 2))
+    weight = np.round(rng.gamma(2.0, 900.0, n_products), 2)
+    sell_end = rng.random(n_products) < 0.33
+    return pa.table({
+        'ProductID': pa.array(ids),
+        'Name': pa.array(names),
+        'ProductNumber': pa.array(numbers),
+        'Color': pa.array(COLORS).take(pa.array(color)),
+        'StandardCost': pa.array(np.round(list_price * rng.uniform(0.45, 0.75, n_products), 4)),
+        'ListPrice': pa.array(list_price),
+        'Size': pa.array(SIZES).take(pa.array(size)),
+        'Weight': pa.array(weight, mask=rng.random(n_products) < 0.4),
+        'ProductCategoryID': pa.array((5 + line * 2 + (grade % 2)).astype(np.int16)),
+        'ProductModelID': pa.array((1 + line * len(GRADES) + grade).astype(np.int16)),
+        'SellStartDate': _dates(np.array(SELL_START, dtype='datetime64[D]')[
+            rng.integers(0, len(SELL_START), n_products)]),
+        'SellEndDate': _dates(np.array(SELL_END, dtype='datetime64[D]')[
+            rng.integers(0, len(SELL_END), n_products)], mask=~sell_end),
+        'DiscontinuedDate': pa.nulls(n_products, pa.timestamp('ms')),
+        'rowguid': _rowguids(rng, n_products),
+    })
+
+
+def customer_shard(start, stop, seed=0):
+    """Customers with CustomerID start+1 .. stop."""
+    rng = _rng(seed, 1, start)
+    n = stop - start
+    ids = np.arange(start + 1, stop + 1, dtype=np.int32)
+    first = rng.integers(0, len(FIRST_NAMES), n)
+    first_names = pa.array(FIRST_NAMES).take(pa.array(first))
+    middle = pa.array(np.array(list('ABCDEFGHJKLMNPRSTW'))[rng.integers(0, 18, n)])
+    company = _join(pa.array(COMPANY_WORDS).take(pa.array(rng.integers(0, len(COMPANY_WORDS), n))), ' ',
+                    pa.array(COMPANY_KINDS).take(pa.array(rng.integers(0, len(COMPANY_KINDS), n))))
+    return pa.table({
+        'CustomerID': pa.array(ids),
+        'NameStyle': pa.array(np.zeros(n, dtype=np.int8)),
+        'Title': _pick(rng, TITLES, TITLE_P, n),
+        'FirstName': first_names,
+        'MiddleName': pc.if_else(pa.array(rng.random(n) < 0.5), _join(middle, '.'), pa.scalar(None, pa.string())),
+        'LastName': pa.array(LAST_NAMES).take(pa.array(rng.integers(0, len(LAST_NAMES), n))),
+        'Suffix': _pick(rng, SUFFIXES, SUFFIX_P, n),
+        'CompanyName': company,
+        'SalesPerson': _join('adventure-works\\', _pick(rng, SALES_PEOPLE, None, n)),
+        'EmailAddress': _join(pc.utf8_lower(first_names), _text(ids // len(FIRST_NAMES) % 10),
+                              '@adventure-works.com'),
+        'Phone': _join(_text(rng.integers(100, 1000, n)), '-555-', _padded(rng.integers(0, 10_000, n), 4)),
+        'rowguid': _rowguids(rng, n),
+    })
+
+
+def order_shard(shard, scale, list_prices, seed=0, lines_per_order=LINES_PER_ORDER,
+                customer_skew=CUSTOMER_SKEW, product_skew=PRODUCT_SKEW):
+    """(orderheader, orderdetails) Arrow tables for one shard of order lines.
+
+    Shard k holds order lines k*chunk_rows .. (k+1)*chunk_rows - 1; its
+    SalesOrderIDs start at ORDER_ID_BASE + k*chunk_rows, which leaves room
+    for one order per line, so IDs never collide between shards.
+    """
+    rng = _rng(seed, 2, shard)
+    chunk = scale.chunk_rows
+    n_shards = -(-scale.detail_rows // chunk)
+    n_lines = min(chunk, scale.detail_rows - shard * chunk)
+
+    # lines per order: geometric with mean lines_per_order, trimmed to n_lines
+    lines = np.empty(0, dtype=np.int64)
+    while lines.sum() < n_lines:
+        more = rng.geometric(1.0 / lines_per_order, int(n_lines / lines_per_order * 1.1) + 16)
+        lines = np.concatenate([lines, more])
+    total = np.cumsum(lines)
+    n_orders = int(np.searchsorted(total, n_lines)) + 1
+    lines = lines[:n_orders]
+    lines[-1] -= total[n_orders - 1] - n_lines
+    order_of_line = np.repeat(np.arange(n_orders), lines)
+
+    # ── details
+    qty = np.minimum(rng.geometric(0.45, n_lines), 40).astype(np.int16)
+    product = _scatter(_power_law(rng, len(list_prices), product_skew, n_lines), len(list_prices), 1)
+    unit_price = np.round(list_prices[product] * 0.6, 4)
+    discount = np.where(qty >= 10, 0.05, np.where(qty >= 5, 0.02, 0.0))
+    line_total = np.round(qty * unit_price * (1 - discount), 6)
+    order_ids = (ORDER_ID_BASE + shard * chunk + np.arange(n_orders)).astype(np.int32)
+    details = pa.table({
+        'SalesOrderID': pa.array(order_ids[order_of_line]),
+        'SalesOrderDetailID': pa.array((DETAIL_ID_BASE + shard * chunk + np.arange(n_lines)).astype(np.int32)),
+        'OrderQty': pa.array(qty),
+        'ProductID': pa.array((PRODUCT_ID_BASE + product).astype(np.int32)),
+        'UnitPrice': pa.array(unit_price),
+        'UnitPriceDiscount': pa.array(discount),
+        'LineTotal': pa.array(line_total),
+        'rowguid': _rowguids(rng, n_lines),
+    })
+
+    # ── headers: dates rise with SalesOrderID across the whole run
+    span = int((LAST_DAY - FIRST_DAY).astype(np.int64)) + 1
+    position = (shard + np.arange(n_orders) / n_orders) / n_shards
+    order_day = FIRST_DAY + (position * span).astype(np.int64)
+    customer = 1 + _scatter(_power_law(rng, scale.customers, customer_skew, n_orders), scale.customers, 2)
+    online = rng.random(n_orders) < 0.3
+    status = np.where(rng.random(n_orders) < 0.01, 1, 5).astype(np.int8)
+    sub_total = np.round(np.bincount(order_of_line, weights=line_total, minlength=n_orders), 4)
+    tax, freight = np.round(sub_total * 0.08, 4), np.round(sub_total * 0.025, 4)
+    null_text = pa.scalar(None, pa.string())
+    header = pa.table({
+        'SalesOrderID': pa.array(order_ids),
+        'RevisionNumber': pa.array(np.where(rng.random(n_orders) < 0.1, 1, 2).astype(np.int8)),
+        'OrderDate': _dates(order_day),
+        'DueDate': _dates(order_day + 12),
+        'ShipDate': _dates(order_day + 7, mask=status != 5),
+        'Status': pa.array(status),
+        'OnlineOrderFlag': pa.array(online.astype(np.int8)),
+        'SalesOrderNumber': _join('SO', _text(order_ids)),
+        'PurchaseOrderNumber': pc.if_else(pa.array(online), null_text,
+                                          _join('PO', _text(rng.integers(10 ** 8, 10 ** 11, n_orders)))),
+        'AccountNumber': _join('10-4020-', _padded(customer, 6)),
+        'CustomerID': pa.array(customer.astype(np.int32)),
+        'ShipToAddressID': pa.array((ADDRESS_ID_BASE + customer).astype(np.int32)),
+        'BillToAddressID': pa.array((ADDRESS_ID_BASE + customer).astype(np.int32)),
+        'ShipMethod': _pick(rng, SHIP_METHODS, SHIP_METHOD_P, n_orders),
+        'CreditCardApprovalCode': pc.if_else(
+            pa.array(online), _join(_padded(rng.integers(0, 10 ** 6, n_orders), 6), 'Vi',
+                                    _padded(rng.integers(0, 10 ** 5, n_orders), 5)), null_text),
+        'SubTotal': pa.array(sub_total),
+        'TaxAmt': pa.array(tax),
+        'Freight': pa.array(freight),
+        'TotalDue': pa.array(np.round(sub_total + tax + freight, 4)),
+        'rowguid': _rowguids(rng, n_orders),
+    })
+    return header, details
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# OUTPUT
+# ───────────────────────────────────────────────────────────────────────────────
+
+_CSV_OPTIONS = pa_csv.WriteOptions(include_header=False, delimiter='|', quoting_style='none', eol='\r\n')
+
+
+def csv_bytes(table):
+    """Rows of `table` in the export layout: '|'-separated, NULL for missing, CRLF."""
+    columns = [pc.fill_null(pc.cast(col, pa.string()), 'NULL') if col.null_count else col
+               for col in table.columns]
+    sink = io.BytesIO()
+    pa_csv.write_csv(pa.table(columns, names=table.column_names), sink, _CSV_OPTIONS)
+    return sink.getvalue()
+
+
+def _for_parquet(table, name):
+    # the 0/1 flag columns are bool in salesloader; Parquet can store that directly
+    bools = [col for col, dtype in TABLES[name]['dtypes'].items() if dtype == 'bool']
+    for col in bools:
+        i = table.schema.get_field_index(col)
+        table = table.set_column(i, col, pc.cast(table[col], pa.bool_()))
+    return table
+
+
+class _TableSink:
+    """One output table: CSV and/or Parquet, written to .tmp files and renamed on close."""
+
+    def __init__(self, out_dir, name, formats):
+        spec = TABLES[name]
+        raw_name = {new: old for old, new in spec['rename'].items()}
+        self.name = name
+        self.rows = 0
+        self._paths = []
+        self._csv = self._parquet = None
+        self._parquet_path = None
+        base = os.path.join(out_dir, os.path.splitext(spec['file'])[0])
+        if 'csv' in formats:
+            self._paths.append(base + '.csv')
+            self._csv = open(base + '.csv.tmp', 'wb')
+            header = '|'.join(raw_name.get(col, col) for col in spec['columns'])
+            self._csv.write(header.encode('latin1') + b'\r\n')
+        if 'parquet' in formats:
+            self._paths.append(base + '.parquet')
+            self._parquet_path = base + '.parquet.tmp'
+
+    def write(self, table, encoded=None):
+        self.rows += table.num_rows
+        if self._csv is not None:
+            self._csv.write(encoded if encoded is not None else csv_bytes(table))
+        if self._parquet_path is not None:
+            table = _for_parquet(table, self.name)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._parquet_path, table.schema)
+            self._parquet.write_table(table)
+
+    def close(self):
+        for handle in (self._csv, self._parquet):
+            if handle is not None:
+                handle.close()
+        for path in self._paths:
+            if os.path.exists(path + '.tmp'):
+                os.replace(path + '.tmp', path)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PUBLIC API
+# ───────────────────────────────────────────────────────────────────────────────
+
+_PRICES = None
+
+
+def _init_worker(list_prices):
+    global _PRICES
+    _PRICES = list_prices
+
+
+def _customer_task(start, stop, seed, encode):
+    table = customer_shard(start, stop, seed)
+    return {'customers': (table, csv_bytes(table) if encode else None)}
+
+
+def _order_task(shard, scale, seed, encode, options):
+    header, details = order_shard(shard, scale, _PRICES, seed, **options)
+    return {'orderheader': (header, csv_bytes(header) if encode else None),
+            'orderdetails': (details, csv_bytes(details) if encode else None)}
+
+
+def generate(out_dir, detail_rows=1_000_000, formats=('csv',), workers=None, seed=0,
+             chunk_rows=DEFAULT_CHUNK_ROWS, lines_per_order=LINES_PER_ORDER,
+             orders_per_customer=ORDERS_PER_CUSTOMER, products=None,
+             customer_skew=CUSTOMER_SKEW, product_skew=PRODUCT_SKEW):
+    """Write customers/orderheader/orderdetails/product into `out_dir`.
+
+    formats: any of 'csv' (the exampledata layout) and 'parquet'.
+    workers=1 builds every shard in this process. Returns {table: rows}.
+    """
+    formats = tuple(formats)
+    unknown = set(formats) - set(FORMATS)
+    if unknown or not formats:
+        raise ValueError(f"formats must be a non-empty subset of {FORMATS}, got {formats!r}")
+    if 'parquet' in formats and pq is None:
+        raise ImportError("formats=('parquet',) needs pyarrow.parquet")
+    scale = plan_scale(detail_rows, lines_per_order, orders_per_customer, products, chunk_rows)
+    options = {'lines_per_order': lines_per_order, 'customer_skew': customer_skew,
+               'product_skew': product_skew}
+    encode = 'csv' in formats
+    os.makedirs(out_dir, exist_ok=True)
+
+    products_tbl = product_table(scale.products, seed)
+    list_prices = products_tbl['ListPrice'].to_numpy()
+    tasks = [(_customer_task, start, min(start + chunk_rows, scale.customers), seed, encode)
+             for start in range(0, scale.customers, chunk_rows)]
+    tasks += [(_order_task, shard, scale, seed, encode, options)
+              for shard in range(-(-scale.detail_rows // chunk_rows))]
+
+    sinks = {name: _TableSink(out_dir, name, formats) for name in TABLES}
+    try:
+        sinks['product'].write(products_tbl)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            _init_worker(list_prices)
+            for fn, *args in tasks:
+                _write(sinks, fn(*args))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(list_prices,)) as pool:
+                # keep only a couple of shards per worker in flight, written in order
+                pending = deque()
+                for fn, *args in tasks:
+                    if len(pending) >= 2 * workers:
+                        _write(sinks, pending.popleft().result())
+                    pending.append(pool.submit(fn, *args))
+                while pending:
+                    _write(sinks, pending.popleft().result())
+    finally:
+        for sink in sinks.values():
+            sink.close()
+    return {name: sink.rows for name, sink in sinks.items()}
+
+
+def _write(sinks, parts):
+    for name, (table, encoded) in parts.items():
+        sinks[name].write(table, encoded)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Write synthetic AdventureWorks-style tables.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows', type=int, default=1_000_000, help="orderdetails rows")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'both'], default='csv')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    formats = FORMATS if args.format == 'both' else (args.format,)
+    t0 = time.perf_counter()
+    counts = generate(args.out_dir, args.rows, formats=formats, workers=args.workers,
+                      seed=args.seed, chunk_rows=args.chunk_rows)
+    elapsed = time.perf_counter() - t0
+    for name, rows in counts.items():
+        print(f"  {name:<13} {rows:>14,} rows")
+    print(f"{elapsed:.1f}s, {args.rows / elapsed:,.0f} order lines/s -> {args.out_dir}")
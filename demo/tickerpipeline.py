@@ -0,0 +1,305 @@
+# ------------------------------------------------------------
+# Per-ticker analytics sharded across a process pool
+# ------------------------------------------------------------
+# After the fetch, finalassignment.py runs everything on the combined
+# frame in one process:
+#     DailyChange, DailyPctChange, UpDay   (row-wise columns)
+#     returns_df = price_df.pct_change() * 100
+#     ma20_df    = price_df.rolling(window=20).mean()
+# For a full-universe run that leaves all but one core idle.
+#
+# run_pipeline() never re-sorts or reshuffles the frame. The rows
+# combine_frames() hands over are every ticker on every date, sorted by
+# Date then Ticker, which is already a (date x ticker) grid: each
+# ticker is a column of the Open/Close arrays. Those two columns are
+# copied into a shared-memory block once and each worker process gets
+# a range of ticker columns; workers map the same block and write their
+# tickers' results into a shared output block in place, so no price data
+# is pickled in either direction. The outputs are then already in the
+# frame's row order, and the wide frames are the same grids. The pool
+# only pays for its start-up with several cores; workers=1 runs the
+# kernel in this process and is already faster than the pandas version.
+#
+# Other input (tickers with different trading days, rows out of order,
+# repeated bars) takes the general path: a stable argsort of the integer
+# ticker codes (a radix sort for up to 32767 tickers) makes every ticker
+# a contiguous slice, only Open and Close are gathered in that order,
+# and the outputs are scattered back to the caller's rows.
+#
+#     result = run_pipeline(combined_df)            # workers = every core
+#     result.combined     # + DailyChange, DailyPctChange, UpDay, Return, MA20
+#                         #   (rows in the input's order)
+#     result.price_df, result.returns_df, result.ma20_df
+#
+# Returns and MA20 are computed along each ticker's own trading days,
+# which matches the wide pct_change/rolling whenever the tickers share
+# a calendar (a date missing for one ticker is skipped, not a NaN gap).
+# ------------------------------------------------------------
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+INPUTS = ['Open', 'Close']
+OUTPUTS = ['DailyChange', 'DailyPctChange', 'UpDay', 'Return', 'MA20']
+
+PipelineResult = namedtuple('PipelineResult', ['combined', 'price_df', 'returns_df', 'ma20_df'])
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PER-TICKER KERNEL (runs in the workers)
+# ───────────────────────────────────────────────────────────────────────────────
+
+def compute_block(inputs, outputs, window):
+    """Fill outputs for a (bars, tickers) block: one column per ticker, oldest bar first."""
+    open_, close = inputs
+    outputs[0] = close - open_
+    outputs[1] = (close - open_) / open_ * 100
+    outputs[2] = close > open_
+    outputs[3, 0] = np.nan
+    outputs[3, 1:] = (close[1:] / close[:-1] - 1) * 100
+    outputs[4] = np.nan
+    if len(close) >= window:
+        # running sums: one pass instead of `window` adds per bar
+        sums = close.cumsum(axis=0)
+        ma = outputs[4, window - 1:]
+        ma[:] = sums[window - 1:]
+        ma[1:] -= sums[:-window]
+        ma /= window
+
+
+def compute_columns(inputs, outputs, bounds, window):
+    """Fill the (first, last) ticker column ranges of (n, dates, tickers) grids."""
+    bounds = np.asarray(bounds, dtype=np.intp).reshape(-1, 2)
+    # adjacent ranges are one block
+    for run in np.split(bounds, np.flatnonzero(bounds[1:, 0] != bounds[:-1, 1]) + 1):
+        if len(run):
+            first, last = run[0, 0], run[-1, 1]
+            compute_block(inputs[:, :, first:last], outputs[:, :, first:last], window)
+
+
+def compute_slices(inputs, outputs, bounds, window):
+    """Fill outputs[:, start:stop] for each (start, stop) ticker slice.
+
+    Neighbouring slices of the same length (tickers sharing a calendar)
+    are reshaped into one block, so a shard costs a handful of array
+    operations rather than a handful per ticker.
+    """
+    bounds = np.asarray(bounds, dtype=np.intp).reshape(-1, 2)
+    if len(bounds) == 0:
+        return
+    lengths = bounds[:, 1] - bounds[:, 0]
+    firsts = np.flatnonzero(np.r_[True, lengths[1:] != lengths[:-1]])
+    for first, last in zip(firsts, np.r_[firsts[1:], len(bounds)]):
+        start, stop, length = bounds[first, 0], bounds[last - 1, 1], lengths[first]
+        if length:
+            compute_block(inputs[:, start:stop].reshape(len(INPUTS), -1, length).transpose(0, 2, 1),
+                          outputs[:, start:stop].reshape(len(OUTPUTS), -1, length).transpose(0, 2, 1),
+                          window)
+
+
+def compute(inputs, outputs, bounds, window, n_dates=None):
+    """Ticker slices of ticker-sorted rows, or with n_dates, ticker columns of a date-major grid."""
+    if n_dates is None:
+        compute_slices(inputs, outputs, bounds, window)
+    else:
+        compute_columns(inputs.reshape(len(INPUTS), n_dates, -1),
+                        outputs.reshape(len(OUTPUTS), n_dates, -1), bounds, window)
+
+
+_shared = {}
+
+
+def _attach(name, shape):
+    # Pool workers share the parent's resource tracker, so attaching
+    # here does not add a second owner; the parent unlinks the block.
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype='float64', buffer=shm.buf)
+
+
+def _init_worker(in_name, out_name, n_rows):
+    _shared['in'] = _attach(in_name, (len(INPUTS), n_rows))
+    _shared['out'] = _attach(out_name, (len(OUTPUTS), n_rows))
+
+
+def _run_shard(bounds, window, n_dates):
+    compute(_shared['in'][1], _shared['out'][1], bounds, window, n_dates)
+    return len(bounds)
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# DRIVER
+# ───────────────────────────────────────────────────────────────────────────────
+
+def grid_dates(codes, n_tickers, stamps):
+    """The dates if the rows are every ticker on every date sorted by Date, Ticker; else None."""
+    if n_tickers == 0 or len(codes) % n_tickers:
+        return None
+    codes = codes.reshape(-1, n_tickers)
+    stamps = stamps.reshape(-1, n_tickers)
+    if ((codes == np.arange(n_tickers)).all() and (stamps == stamps[:, :1]).all()
+            and (stamps[1:, 0] > stamps[:-1, 0]).all()):
+        return pd.DatetimeIndex(stamps[:, 0], name='Date')
+    return None
+
+
+def ticker_order(codes, stamps):
+    """Row order that makes every ticker a contiguous, date-sorted slice.
+
+    Returns (order, sorted_codes). Repeated (Ticker, Date) rows are left
+    out of `order`; the last one is kept.
+    """
+    # int16 codes get numpy's radix sort, and stable keeps the date order
+    codes = codes.astype(np.int16 if codes.max(initial=0) <= np.iinfo(np.int16).max else np.int32)
+    stamps = stamps.view('int64')
+    order = np.argsort(codes, kind='stable')
+    sorted_codes, sorted_stamps = codes[order], stamps[order]
+    if ((sorted_codes[1:] != sorted_codes[:-1]) | (sorted_stamps[1:] > sorted_stamps[:-1])).all():
+        return order, sorted_codes
+
+    # rows were not in date order, or a bar is repeated: full sort
+    order = np.lexsort((stamps, codes))
+    sorted_codes, sorted_stamps = codes[order], stamps[order]
+    keep = np.r_[(sorted_codes[1:] != sorted_codes[:-1])
+                 | (sorted_stamps[1:] != sorted_stamps[:-1]), True]
+    return order[keep], sorted_codes[keep]
+
+
+def ticker_bounds(codes):
+    """(start, stop) row range of each ticker in sorted ticker codes."""
+    if len(codes) == 0:
+        return np.empty((0, 2), dtype=np.intp)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    return np.column_stack([starts, stops])
+
+
+def make_shards(bounds, n_shards):
+    """Split ticker slices into about `n_shards` groups of similar row counts."""
+    if len(bounds) == 0:
+        return []
+    cut_rows = np.linspace(0, bounds[-1, 1], n_shards + 1)[1:-1]
+    cuts = np.unique(np.searchsorted(bounds[:, 1], cut_rows))
+    return [shard.tolist() for shard in np.split(bounds, cuts) if len(shard)]
+
+
+def run_kernel(columns, bounds, window, n_dates=None, workers=1, shards_per_worker=4):
+    """Outputs (len(OUTPUTS), rows) for the input `columns`, across `workers` processes."""
+    n = len(columns[0])
+    if workers == 1 or n == 0:
+        outputs = np.empty((len(OUTPUTS), n))
+        compute(np.stack(columns), outputs, bounds, window, n_dates)
+        return outputs
+
+    size = n * 8
+    shm_in = shared_memory.SharedMemory(create=True, size=len(INPUTS) * size)
+    shm_out = shared_memory.SharedMemory(create=True, size=len(OUTPUTS) * size)
+    try:
+        inputs = np.ndarray((len(INPUTS), n), dtype='float64', buffer=shm_in.buf)
+        inputs[:] = columns
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm_in.name, shm_out.name, n)) as pool:
+            shards = make_shards(bounds, workers * shards_per_worker)
+            list(pool.map(_run_shard, shards, [window] * len(shards), [n_dates] * len(shards)))
+        outputs = np.ndarray((len(OUTPUTS), n), dtype='float64', buffer=shm_out.buf).copy()
+        del inputs
+    finally:
+        for shm in (shm_in, shm_out):
+            shm.close()
+            shm.unlink()
+    return outputs
+
+
+def run_pipeline(combined_df, workers=None, window=20, shards_per_worker=4):
+    """Per-ticker columns + wide price/returns/MA frames, computed across processes.
+
+    workers=1 runs the same kernel in this process (no pool).
+    """
+    workers = workers or os.cpu_count() or 1
+    df = combined_df.dropna(subset=INPUTS).reset_index(drop=True)
+    codes, tickers = pd.factorize(df['Ticker'], sort=True)
+    tickers = pd.Index(tickers, name='Ticker')
+    stamps = df['Date'].to_numpy()
+    dates = grid_dates(codes, len(tickers), stamps)
+
+    if dates is not None:
+        # one (first, last) column range per ticker of the date-major grid
+        bounds = np.column_stack([np.arange(len(tickers)), np.arange(1, len(tickers) + 1)])
+        columns = [df[col].to_numpy(dtype='float64') for col in INPUTS]
+        outputs = run_kernel(columns, bounds, window, len(dates), workers, shards_per_worker)
+        grids = [values.reshape(len(dates), len(tickers))
+                 for values in (columns[INPUTS.index('Close')], outputs[OUTPUTS.index('Return')],
+                                outputs[OUTPUTS.index('MA20')])]
+        for i, col in enumerate(OUTPUTS):
+            df[col] = outputs[i].astype(bool) if col == 'UpDay' else outputs[i]
+    else:
+        order, codes = ticker_order(codes, stamps)
+        if len(order) < len(df):
+            kept = np.sort(order)
+            df, stamps = df.take(kept).reset_index(drop=True), stamps[kept]
+            order = np.searchsorted(kept, order)
+        bounds = ticker_bounds(codes)
+        columns = [df[col].to_numpy(dtype='float64')[order] for col in INPUTS]
+        outputs = run_kernel(columns, bounds, window, None, workers, shards_per_worker)
+        values = np.empty_like(outputs)
+        values[:, order] = outputs
+        for i, col in enumerate(OUTPUTS):
+            df[col] = values[i].astype(bool) if col == 'UpDay' else values[i]
+
+        # one scatter into (date, ticker) cells for all three wide frames
+        date_codes, dates = pd.factorize(stamps[order], sort=True)
+        dates = pd.DatetimeIndex(dates, name='Date')
+        tickers = tickers[codes[bounds[:, 0]]] if len(bounds) else tickers[:0]
+        grids = np.full((3, len(dates), len(tickers)), np.nan)
+        grids[:, date_codes, np.repeat(np.arange(len(tickers)), bounds[:, 1] - bounds[:, 0])] = np.stack(
+            [columns[INPUTS.index('Close')], outputs[OUTPUTS.index('Return')], outputs[OUTPUTS.index('MA20')]])
+
+    price_df, returns_df, ma20_df = (pd.DataFrame(grid, index=dates, columns=tickers) for grid in grids)
+    return PipelineResult(df, price_df, returns_df.dropna(how='all'), ma20_df)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    from fakepolygon import fake_bars
+    from polygonfetch import bars_to_frame, combine_frames
+
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    combined_df = combine_frames({t: bars_to_frame(fake_bars(t, '2018-01-01', '2023-01-01'), t)
+                                  for t in tickers})
+    print(f"{len(combined_df):,} rows, {n_tickers:,} tickers, {os.cpu_count()} cores")
+
+    t0 = time.perf_counter()
+    # what finalassignment.py does today
+    combined_df = combined_df.sort_values(['Date', 'Ticker']).reset_index(drop=True)
+    combined_df['DailyChange'] = combined_df['Close'] - combined_df['Open']
+    combined_df['DailyPctChange'] = (combined_df['Close'] - combined_df['Open']) / combined_df['Open'] * 100
+    combined_df['UpDay'] = combined_df['Close'] > combined_df['Open']
+    price_df = combined_df.pivot(index='Date', columns='Ticker', values='Close').sort_index()
+    returns_df = (price_df.pct_change(fill_method=None) * 100).dropna(how='all')
+    ma20_df = price_df.rolling(window=20).mean()
+    t1 = time.perf_counter()
+    print(f"  {'single process':<20} {t1 - t0:6.2f}s")
+
+    bars = combined_df[['Open', 'High', 'Low', 'Close', 'Volume', 'Date', 'Ticker']]
+    runs = [(f"run_pipeline({workers:>2})", bars, workers) for workers in sorted({1, os.cpu_count() or 1, 2})]
+    # a ticker missing days takes the general (argsort + scatter) path
+    runs.append(("missing days (1)", bars.drop(index=bars.index[1:5000:50]), 1))
+    for label, frame, workers in runs:
+        t0 = time.perf_counter()
+        result = run_pipeline(frame, workers=workers)
+        elapsed = time.perf_counter() - t0
+        if len(frame) < len(bars):
+            print(f"  {label:<20} {elapsed:6.2f}s")
+            continue
+        same = (np.allclose(result.returns_df, returns_df, equal_nan=True)
+                and np.allclose(result.ma20_df, ma20_df, equal_nan=True)
+                and result.combined['UpDay'].equals(combined_df['UpDay'])
+                and np.allclose(result.combined['DailyPctChange'], combined_df['DailyPctChange']))
+        print(f"  {label:<20} {elapsed:6.2f}s   same={same}")
@@ -0,0 +1,123 @@
+# ------------------------------------------------------------
+# Per-ticker extremes report in one groupby
+# ------------------------------------------------------------
+# finalassignment.py finds each ticker's highest/lowest close with
+#     for tic in tickers:
+#         df_tic = combined_df[combined_df['Ticker'] == tic]
+#         ... df_tic['Close'].idxmax() ...
+# which scans the whole combined_df once per ticker (tickers × rows),
+# and computes volume totals/means and the up-day ratio with separate
+# groupbys on top of that.
+#
+# extremes_report() factorizes Ticker once and gets every statistic
+# from that single grouping, so the cost is linear in the number of
+# rows however many tickers there are:
+#
+#     report = extremes_report(combined_df)
+#     report.loc['AAPL', ['MaxClose', 'MaxCloseDate']]
+#
+# DailyChange / UpDay are derived on the fly when combined_df does
+# not have them yet.
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+REPORT_COLUMNS = [
+    'Days', 'MaxClose', 'MaxCloseDate', 'MinClose', 'MinCloseDate',
+    'UpDayPct', 'TotalVolume', 'AvgVolume',
+    'AvgDailyChange', 'StdDailyChange', 'MaxDailyChange', 'MinDailyChange',
+]
+
+
+def extremes_report(combined_df, key='Ticker'):
+    """One row per ticker: close extremes with dates, up-day %, volume and DailyChange stats."""
+    close = combined_df['Close']
+    change = (combined_df['DailyChange'] if 'DailyChange' in combined_df
+              else close - combined_df['Open'])
+    up_day = combined_df['UpDay'] if 'UpDay' in combined_df else close > combined_df['Open']
+
+    work = pd.DataFrame({
+        key: combined_df[key],
+        'Close': close,
+        'Volume': combined_df['Volume'],
+        'DailyChange': change,
+        'UpDay': up_day.astype('float64'),
+    })
+    # positional index so idxmax/idxmin give row numbers into Date
+    work.index = pd.RangeIndex(len(work))
+
+    grouped = work.groupby(key, sort=True, observed=True)
+    stats = grouped.agg(
+        Days=('Close', 'count'),
+        MaxClose=('Close', 'max'),
+        MinClose=('Close', 'min'),
+        UpDayPct=('UpDay', 'mean'),
+        TotalVolume=('Volume', 'sum'),
+        AvgVolume=('Volume', 'mean'),
+        AvgDailyChange=('DailyChange', 'mean'),
+        StdDailyChange=('DailyChange', 'std'),
+        MaxDailyChange=('DailyChange', 'max'),
+        MinDailyChange=('DailyChange', 'min'),
+    )
+
+    # Extreme-close dates from the same grouping: the first row of each
+    # ticker whose Close equals the ticker's max/min, which is what
+    # idxmax/idxmin return. A ticker with no Close at all (new listing,
+    # halted ticker, failed fetch) has no such row and gets NaT, where
+    # idxmax/idxmin would raise.
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype='int64')
+    close_values = work['Close'].to_numpy(dtype='float64')
+    dates = pd.Index(combined_df['Date'])
+    for column, extreme in (('MaxCloseDate', 'MaxClose'), ('MinCloseDate', 'MinClose')):
+        matches = (codes >= 0) & (close_values == stats[extreme].to_numpy(dtype='float64')[codes])
+        stats[column] = _first_dates(dates, codes, matches, len(stats))
+    stats['UpDayPct'] *= 100
+    return stats[REPORT_COLUMNS]
+
+
+def _first_dates(dates, codes, matches, n_groups):
+    """Date of the first matching row of each group (NaT where none matches)."""
+    rows = np.flatnonzero(matches)
+    groups, first = np.unique(codes[rows], return_index=True)
+    positions = np.full(n_groups, -1, dtype=np.intp)
+    positions[groups] = rows[first]
+    return dates.take(np.maximum(positions, 0)).where(positions >= 0).to_numpy()
+
+
+def print_extremes(report):
+    """Same lines finalassignment.py prints, from the report."""
+    for tic, row in report.iterrows():
+        if pd.isna(row['MaxCloseDate']):
+            print(f"{tic}: no Close prices")
+            continue
+        print(f"{tic}: Highest Close = {row['MaxClose']:.2f} on {row['MaxCloseDate'].date()}, "
+              f"Lowest Close = {row['MinClose']:.2f} on {row['MinCloseDate'].date()}")
+
+
+if __name__ == '__main__':
+    import time
+
+    from fakepolygon import fake_bars
+    from polygonfetch import bars_to_frame, combine_frames
+
+    tickers = [f"T{i:04d}" for i in range(1000)]
+    combined_df = combine_frames({t: bars_to_frame(fake_bars(t, '2022-01-01', '2023-01-01'), t)
+                                  for t in tickers})
+    print(f"{len(combined_df):,} rows, {len(tickers):,} tickers")
+
+    t0 = time.perf_counter()
+    loop = {}
+    for tic in tickers:
+        df_tic = combined_df[combined_df['Ticker'] == tic]
+        loop[tic] = (df_tic['Close'].max(), df_tic.loc[df_tic['Close'].idxmax(), 'Date'],
+                     df_tic['Close'].min(), df_tic.loc[df_tic['Close'].idxmin(), 'Date'])
+    t1 = time.perf_counter()
+    report = extremes_report(combined_df)
+    t2 = time.perf_counter()
+
+    same = all(loop[t] == (r['MaxClose'], r['MaxCloseDate'], r['MinClose'], r['MinCloseDate'])
+               for t, r in report.iterrows())
+    print(f"  per-ticker loop   {t1 - t0:7.3f}s")
+    print(f"  extremes_report   {t2 - t1:7.3f}s   x{(t1 - t0) / (t2 - t1):.0f}   same extremes={same}")
+    print(report.head())
@@ -0,0 +1,280 @@
+# ------------------------------------------------------------
+# Batch mode for the transformation assistant
+# ------------------------------------------------------------
+# openaidemo.py handles one input() instruction per run, reloading the
+# CSV each time. run_batch() takes a whole list of standard
+# transformations for one table:
+#
+#   * the table is parsed once (salesloader) and every snippet runs
+#     against that same frame (each gets a shallow copy)
+#   * the completion calls go out concurrently from a bounded thread
+#     pool, one per distinct instruction not already in the code cache
+#   * each snippet is compiled once (transformfunc.Transformation) and
+#     run in-process, or in the resource-limited sandbox (sandbox.py)
+#   * a report row per instruction: status, error, output shape, whether
+#     the code came from the cache ('cached') or from an earlier row of
+#     the same batch ('reused'), and generate/run timings
+#
+#     python transformbatch.py instructions.txt --report report.csv --offline
+#     python transformbatch.py instructions.txt --base-url http://host/v1 --workers 8
+#
+# An instruction file has one instruction per line ('#' comments and
+# blank lines skipped), optionally named as "name: instruction"; a
+# .jsonl file holds {"name": ..., "instruction": ...} objects.
+# ChatHTTPClient speaks the chat completions API with requests, so this
+# runs without the openai package and against fakecompletion's server.
+# ------------------------------------------------------------
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+import requests
+
+from transformcache import (DEFAULT_MODEL, CodeCache, cache_key, generate_code,
+                            normalize_instruction, schema_text)
+from transformfunc import Transformation
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REPORT_COLUMNS = ['name', 'instruction', 'status', 'error', 'rows', 'columns',
+                  'cached', 'reused', 'generate_s', 'run_s', 'code']
+
+
+class CompletionError(RuntimeError):
+    """The chat completions API failed after retries."""
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# HTTP CLIENT
+# ───────────────────────────────────────────────────────────────────────────────
+
+class ChatHTTPClient:
+    """Minimal OpenAI-compatible client: client.chat.completions.create(model, messages, ...).
+
+    One requests.Session per thread, retries with backoff on 429/5xx
+    (honouring Retry-After).
+    """
+
+    def __init__(self, base_url='https://api.openai.com/v1', api_key=None, timeout=60,
+                 max_retries=4, backoff=0.5, max_backoff=20):
+        self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
+        if not self.api_key:
+            raise ValueError("Pass api_key= or set the OPENAI_API_KEY environment variable")
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._local = threading.local()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['Authorization'] = f"Bearer {self.api_key}"
+            self._local.session = session
+        return session
+
+    def _create(self, model, messages, temperature=None, **kwargs):
+        body = {'model': model, 'messages': messages, **kwargs}
+        if temperature is not None:
+            body['temperature'] = temperature
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self._session().post(self.url, json=body, timeout=self.timeout)
+            except requests.RequestException as err:
+                last_error = err
+            else:
+                if response.status_code == 200:
+                    return _as_namespace(response.json())
+                if response.status_code not in RETRY_STATUSES:
+                    raise CompletionError(f"HTTP {response.status_code}: {response.text[:200]}")
+                last_error = CompletionError(f"HTTP {response.status_code}")
+            if attempt == self.max_retries:
+                break
+            retry_after = response.headers.get('Retry-After') if response is not None else None
+            try:
+                delay = min(float(retry_after), self.max_backoff)
+            except (TypeError, ValueError):
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            time.sleep(delay)
+        raise CompletionError(f"Giving up after {self.max_retries + 1} attempts") from last_error
+
+
+def _as_namespace(value):
+    """JSON → nested SimpleNamespace, so response.choices[0].message.content works."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _as_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_as_namespace(v) for v in value]
+    return value
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# BATCH
+# ───────────────────────────────────────────────────────────────────────────────
+
+_NAMED = re.compile(r'^([A-Za-z_][\w-]*):\s+(.+)$')
+
+
+def load_instructions(path):
+    """[(name, instruction), ...] from a text or .jsonl instruction file."""
+    items = []
+    with open(path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if path.endswith('.jsonl'):
+                entry = json.loads(line)
+                items.append((entry.get('name') or f"t{len(items) + 1:02d}", entry['instruction']))
+                continue
+            named = _NAMED.match(line)
+            if named:
+                items.append((named.group(1), named.group(2)))
+            else:
+                items.append((f"t{len(items) + 1:02d}", line))
+    return items
+
+
+def _generate(client, instruction, df, model):
+    start = time.perf_counter()
+    try:
+        code = generate_code(client, instruction, df, model=model)
+        return code, None, time.perf_counter() - start
+    except Exception as err:                  # recorded in the report, not raised
+        return None, f"{type(err).__name__}: {err}", time.perf_counter() - start
+
+
+def run_batch(client, instructions, df, cache=None, model=DEFAULT_MODEL, max_workers=8,
+              sandbox=False, sandbox_limits=None):
+    """Generate and run every (name, instruction) against `df`; returns the report frame.
+
+    Completion calls run concurrently (at most `max_workers` in flight),
+    one per distinct cache key that is not already cached -- repeated
+    instructions in the batch share a single call. Each snippet then runs
+    on the same parsed frame: in-process by default, or through
+    sandbox.run_sandboxed (with `sandbox_limits`) when sandbox=True.
+    """
+    schema = schema_text(df)
+    keys = [cache_key(instruction, schema, model) for _, instruction in instructions]
+    codes, errors, timings, from_cache = {}, {}, {}, set()
+    for key, (_, instruction) in zip(keys, instructions):
+        if key in codes or key in timings:
+            continue
+        code = cache.get(key) if cache is not None else None
+        if code is not None:
+            codes[key] = code
+            from_cache.add(key)
+        timings[key] = 0.0
+
+    todo = {key: instruction for key, (_, instruction) in zip(keys, instructions) if key not in codes}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {key: pool.submit(_generate, client, instruction, df, model)
+                   for key, instruction in todo.items()}
+        for key, future in futures.items():
+            code, error, elapsed = future.result()
+            timings[key] = elapsed
+            if code is None:
+                errors[key] = error
+                continue
+            codes[key] = code
+            if cache is not None:
+                cache.put(key, code, normalize_instruction(todo[key]), schema, model)
+
+    rows = []
+    seen = set()
+    for (name, instruction), key in zip(instructions, keys):
+        code = codes.get(key)
+        row = {'name': name, 'instruction': instruction, 'status': 'error', 'error': errors.get(key),
+               'rows': None, 'columns': None, 'cached': key in from_cache, 'reused': key in seen,
+               'generate_s': 0.0 if key in seen else round(timings[key], 4), 'run_s': None,
+               'code': code}
+        seen.add(key)
+        if code is not None:
+            start = time.perf_counter()
+            try:
+                transform = Transformation(code, name, instruction)
+                if sandbox:
+                    from sandbox import run_sandboxed
+                    result = run_sandboxed(transform, df, **(sandbox_limits or {}))
+                else:
+                    result = transform(df)
+                row.update(status='ok', rows=len(result), columns=result.shape[1])
+            except Exception as err:
+                row['error'] = f"{type(err).__name__}: {str(err).strip().splitlines()[-1]}"
+            row['run_s'] = round(time.perf_counter() - start, 4)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+
+def write_report(report, path):
+    """Report as .json (records, with the code) or .csv, by extension."""
+    if path.endswith('.json'):
+        report.to_json(path, orient='records', indent=2)
+    else:
+        report.to_csv(path, index=False)
+
+
+if __name__ == '__main__':
+    import argparse
+    import tempfile
+
+    from salesloader import load_table
+
+    parser = argparse.ArgumentParser(description="Run a file of transformation instructions.")
+    parser.add_argument('instructions', nargs='?', help="instruction file (.txt or .jsonl)")
+    parser.add_argument('--table', default='orderdetails', help="exampledata table to transform")
+    parser.add_argument('--report', default='transform_report.csv')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--base-url', default='https://api.openai.com/v1')
+    parser.add_argument('--offline', action='store_true', help="use a local fake completion server")
+    parser.add_argument('--sandbox', action='store_true', help="run each snippet in the sandbox")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    df = load_table(args.table)
+    if args.instructions:
+        instructions = load_instructions(args.instructions)
+    else:
+        instructions = [('linetotal', 'Add a LineTotal column'),
+                        ('qty_by_product', 'Total OrderQty by product'),
+                        ('by_price', 'Sort by price, highest first'),
+                        ('multi_qty', 'Only rows with quantity above 1'),
+                        ('noop', 'Keep the data as is')] * 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = None if args.no_cache else CodeCache(os.path.join(tmp, 'codecache.sqlite'))
+        if args.offline:
+            from fakecompletion import FakeCompletionServer
+            server = FakeCompletionServer(latency=0.3).start()
+            client = ChatHTTPClient(server.base_url, api_key='test')
+        else:
+            server = None
+            client = ChatHTTPClient(args.base_url)
+        try:
+            for workers in ([1, args.workers] if args.offline else [args.workers]):
+                if cache is not None:
+                    cache.clear()
+                t0 = time.perf_counter()
+                report = run_batch(client, instructions, df, cache=cache, model=args.model,
+                                   max_workers=workers, sandbox=args.sandbox)
+                print(f"{len(report)} instructions, {workers} worker(s): "
+                      f"{time.perf_counter() - t0:.2f}s, {(report['status'] == 'ok').sum()} ok, "
+                      f"{int(report['cached'].sum())} from cache, {int(report['reused'].sum())} reused")
+        finally:
+            if server is not None:
+                server.stop()
+        write_report(report, args.report)
+        print(report.drop(columns=['code', 'instruction']).head(10).to_string(index=False))
+        print(f"report written to {args.report}")
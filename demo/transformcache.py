@@ -0,0 +1,236 @@
+# ------------------------------------------------------------
+# Persistent cache of LLM-generated pandas code (for openaidemo.py)
+# ------------------------------------------------------------
+# openaidemo.py sends the instruction, df.dtypes and 5 sample rows to
+# the chat API on every run, even when the same transformation was
+# asked for yesterday. generate_code() looks in a small SQLite cache
+# first:
+#
+#     key = sha256(model, normalized instruction, schema)
+#
+# Normalizing collapses whitespace and drops trailing punctuation, so
+# "Add a  LineTotal column." and "Add a LineTotal column" share an entry.
+# Case is kept: column names and string values are case-sensitive, so
+# "Color == 'Red'" and "Color == 'red'" are different transformations.
+# The sample rows are left out of the key on purpose: the code depends
+# on the columns and dtypes, not on which five rows happened to be first.
+#
+# The cache keeps at most `max_entries` entries / `max_bytes` of code and
+# evicts the least recently used first. StubClient answers like the
+# OpenAI client (client.chat.completions.create(...)) without a network,
+# so everything here runs offline:
+#
+#     cache = CodeCache()                       # demo/codecache.sqlite
+#     code = generate_code(StubClient(), "add a LineTotal column", df, cache=cache)
+# ------------------------------------------------------------
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codecache.sqlite')
+DEFAULT_MODEL = 'gpt-4'
+SYSTEM_PROMPT = "You are a Python data assistant. Only output Python code."
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PROMPT / RESPONSE HELPERS
+# ───────────────────────────────────────────────────────────────────────────────
+
+def normalize_instruction(instruction):
+    """Collapse whitespace and drop trailing punctuation; case is kept."""
+    return re.sub(r'\s+', ' ', instruction).strip().rstrip('.!?;').strip()
+
+
+def schema_text(df):
+    """The df.dtypes listing openaidemo.py puts in the prompt."""
+    return df.dtypes.to_string()
+
+
+def build_messages(instruction, df, n_sample=5):
+    """Chat messages exactly as openaidemo.py builds them."""
+    sample_data = df.head(n_sample).to_dict(orient='records')
+    prompt_text = (
+        f"Perform the following transformation on the DataFrame:\n{instruction}\n\n"
+        f"DataFrame schema:\n{schema_text(df)}\n\n"
+        f"First 5 rows:\n{sample_data}\n\n"
+        "Provide only the Python pandas code (no explanation) to accomplish this."
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt_text},
+    ]
+
+
+def extract_code(content):
+    """Strip Markdown fences (and a language hint) from a completion."""
+    text = content.strip()
+    fenced = re.search(r'```[a-zA-Z0-9_+-]*\n(.*?)```', text, re.DOTALL)
+    if fenced:
+        return fenced.group(1).strip()
+    return text.strip('`').strip()
+
+
+def cache_key(instruction, schema, model=DEFAULT_MODEL):
+    payload = '\x1f'.join([model, normalize_instruction(instruction), schema])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# CACHE
+# ───────────────────────────────────────────────────────────────────────────────
+
+class CodeCache:
+    """SQLite-backed LRU cache of generated code, capped by entries and bytes."""
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=256, max_bytes=1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # one connection shared by every thread, used under a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, model TEXT, instruction TEXT, schema TEXT,"
+            " code TEXT, size INTEGER, created REAL, last_used REAL)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Cached code for `key` (and mark it recently used), or None."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT code FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return row[0]
+
+    def put(self, key, code, instruction='', schema='', model=DEFAULT_MODEL):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, instruction, schema, code, len(code.encode('utf-8')), now, now))
+            self._evict()
+
+    def _evict(self):
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # walk from least recently used, dropping until both caps hold
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_used, created"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self):
+        self._conn.close()
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# OFFLINE CLIENT
+# ───────────────────────────────────────────────────────────────────────────────
+
+# (pattern in the normalized instruction, case-insensitive, code) -- first match wins
+STUB_RULES = [
+    (r'line ?total', "df_transformed = df.copy()\n"
+                     "df_transformed['LineTotal'] = df_transformed['OrderQty'] * df_transformed['UnitPrice']"),
+    (r'(sum|total).*(by|per) product',
+     "df_transformed = df.groupby('ProductID', as_index=False)['OrderQty'].sum()"),
+    (r'sort.*price', "df_transformed = df.sort_values('UnitPrice', ascending=False)"),
+    (r'(filter|only).*(qty|quantity)', "df_transformed = df[df['OrderQty'] > 1]"),
+]
+STUB_DEFAULT = "df_transformed = df.copy()"
+
+
+class StubClient:
+    """Offline stand-in for openai.OpenAI: client.chat.completions.create(...).
+
+    Answers from `rules` ([(regex, code)], matched against the normalized
+    instruction, ignoring case) wrapped in a ```python fence, like the
+    real model tends to.
+    """
+
+    def __init__(self, rules=None, default=STUB_DEFAULT, latency=0.0):
+        self.rules = [(re.compile(p, re.IGNORECASE), code) for p, code in (STUB_RULES if rules is None else rules)]
+        self.default = default
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def code_for(self, instruction):
+        text = normalize_instruction(instruction)
+        return next((code for pattern, code in self.rules if pattern.search(text)), self.default)
+
+    def _create(self, model, messages, temperature=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[-1]['content']
+        match = re.search(r'on the DataFrame:\n(.*?)\n\nDataFrame schema:', prompt, re.DOTALL)
+        code = self.code_for(match.group(1) if match else prompt)
+        message = SimpleNamespace(role='assistant', content=f"```python\n{code}\n```")
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)])
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# PUBLIC API
+# ───────────────────────────────────────────────────────────────────────────────
+
+def generate_code(client, instruction, df, cache=None, model=DEFAULT_MODEL, temperature=0):
+    """Pandas code for `instruction` on `df`, from the cache or the chat API."""
+    schema = schema_text(df)
+    key = cache_key(instruction, schema, model)
+    if cache is not None:
+        code = cache.get(key)
+        if code is not None:
+            return code
+    response = client.chat.completions.create(
+        model=model,
+        messages=build_messages(instruction, df),
+        temperature=temperature,
+    )
+    code = extract_code(response.choices[0].message.content)
+    if cache is not None:
+        cache.put(key, code, normalize_instruction(instruction), schema, model)
+    return code
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    import pandas as pd
+
+    df = pd.DataFrame({'SalesOrderID': [1, 1, 2], 'ProductID': [10, 11, 10],
+                       'OrderQty': [1, 3, 2], 'UnitPrice': [9.5, 20.0, 9.5]})
+    client = StubClient(latency=0.5)      # pretend round-trip
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CodeCache(os.path.join(tmp, 'codecache.sqlite'), max_entries=2)
+        for instruction in ["Add a LineTotal column.", "Add a  LineTotal column", "add a linetotal column",
+                            "total qty by product", "sort by price", "Add a LineTotal column"]:
+            t0 = time.perf_counter()
+            code = generate_code(client, instruction, df, cache=cache)
+            print(f"{1000 * (time.perf_counter() - t0):7.1f} ms  {instruction!r:32} -> {code.splitlines()[-1]}")
+        print(f"hits={cache.hits} misses={cache.misses} api calls={client.calls} entries={len(cache)}")
+        cache.close()
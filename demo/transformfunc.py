@@ -0,0 +1,264 @@
+# ------------------------------------------------------------
+# Generated pandas snippets as compiled, reusable functions
+# ------------------------------------------------------------
+# openaidemo.py runs the model's code once:
+#     exec(generated_code, {"pd": pd, "df": df})
+#     result_df = namespace.get("df_transformed", namespace.get("df"))
+# which only ever sees one frame.
+#
+# Transformation parses the snippet once, wraps its statements in
+#     def transform(df):
+#         <snippet>
+#         return df_transformed      # or df, if the snippet never assigns it
+# and compiles that function. Calling it is an ordinary function call,
+# so the same instruction can be applied to any number of frames, or
+# chunk by chunk to a file too big to load:
+#
+#     t = Transformation.from_instruction(client, "add a LineTotal column", sample_df)
+#     t(df)                                          # one frame
+#     t.apply_table('orderdetails', 'orderdetails_t.parquet', chunksize=500_000)
+#     t.save('linetotal.json'); Transformation.load('linetotal.json')
+#
+# validate() runs it once on the sample and records the output columns
+# and dtypes; later frames and chunks must produce the same columns with
+# the same kind of dtype (int32 for an int64 is fine, str for a float
+# is not).
+# Snippets that group, sort, shift, aggregate ... need to see all rows at
+# once, so apply_chunks() refuses them (row_local is False) unless told
+# otherwise.
+# ------------------------------------------------------------
+
+import ast
+import builtins
+import json
+
+import numpy as np
+import pandas as pd
+
+from transformcache import generate_code
+
+# methods whose result depends on rows outside the current chunk
+CROSS_ROW_METHODS = {
+    'groupby', 'sort_values', 'sort_index', 'drop_duplicates', 'duplicated', 'pivot',
+    'pivot_table', 'merge', 'join', 'rank', 'shift', 'diff', 'pct_change', 'rolling',
+    'expanding', 'ewm', 'cumsum', 'cumprod', 'cummax', 'cummin', 'nlargest', 'nsmallest',
+    'head', 'tail', 'sample', 'value_counts', 'unique', 'nunique', 'sum', 'mean', 'median',
+    'min', 'max', 'std', 'var', 'count', 'agg', 'aggregate', 'describe', 'quantile',
+    'idxmax', 'idxmin', 'resample', 'crosstab', 'corr', 'transform', 'reset_index',
+}
+
+_TEMPLATE = "def transform(df):\n    pass\n"
+
+
+class TransformError(ValueError):
+    """Generated code that cannot be compiled or produced the wrong output."""
+
+
+def _dtype_group(name):
+    # int8..int64/uint -> 'i', float16..64 -> 'f', datetime64[any unit] -> 'M', ...
+    # so a sample read by plain read_csv (int64) and a salesloader chunk
+    # (int32/int16) count as the same schema
+    if name == 'category':
+        return 'category'
+    try:
+        kind = pd.api.types.pandas_dtype(name).kind
+    except TypeError:
+        return name
+    return 'i' if kind == 'u' else kind
+
+
+def _compile(code, name):
+    """(transform function, parsed snippet) for the snippet text."""
+    try:
+        snippet = ast.parse(code, filename=f'<{name}>')
+    except SyntaxError as err:
+        raise TransformError(f"Generated code for {name!r} does not parse: {err}") from None
+    assigned = {node.id for node in ast.walk(snippet)
+                if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)}
+    result = 'df_transformed' if 'df_transformed' in assigned else 'df'
+
+    module = ast.parse(_TEMPLATE)
+    module.body[0].body = snippet.body + [ast.Return(ast.Name(result, ast.Load()))]
+    ast.fix_missing_locations(module)
+    namespace = {'pd': pd, 'np': np, '__builtins__': builtins}
+    exec(compile(module, f'<{name}>', 'exec'), namespace)
+    return namespace['transform'], snippet
+
+
+def _called_methods(tree):
+    return {node.func.attr for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)}
+
+
+class Transformation:
+    """One generated snippet, compiled once and callable on any DataFrame."""
+
+    def __init__(self, code, name='transform', instruction=''):
+        self.code = code
+        self.name = name
+        self.instruction = instruction
+        self._fn, tree = _compile(code, name)
+        self.cross_row_calls = sorted(_called_methods(tree) & CROSS_ROW_METHODS)
+        self.output_dtypes = None
+
+    def __repr__(self):
+        return f"Transformation({self.name!r}, row_local={self.row_local})"
+
+    @property
+    def row_local(self):
+        """True if every output row only depends on its own input row."""
+        return not self.cross_row_calls
+
+    # ── running ──────────────────────────────────────────────────────────────
+
+    def __call__(self, df):
+        # shallow copy: the snippet may add/replace columns on `df`, and
+        # the caller's frame should not change under them
+        result = self._fn(df.copy(deep=False))
+        if not isinstance(result, pd.DataFrame):
+            raise TransformError(f"{self.name!r} returned {type(result).__name__}, not a DataFrame")
+        return result
+
+    def validate(self, sample):
+        """Run on a sample once and remember the output schema."""
+        result = self(sample)
+        self.output_dtypes = result.dtypes.astype(str).to_dict()
+        return result
+
+    def check_output(self, result):
+        if self.output_dtypes is None:
+            return result
+        got = result.dtypes.astype(str).to_dict()
+        if list(got) != list(self.output_dtypes):
+            raise TransformError(f"{self.name!r} produced columns {list(got)}, "
+                                 f"expected {list(self.output_dtypes)}")
+        changed = {c: (self.output_dtypes[c], got[c]) for c in got
+                   if 'category' not in (got[c], self.output_dtypes[c])
+                   and _dtype_group(got[c]) != _dtype_group(self.output_dtypes[c])}
+        if changed:
+            raise TransformError(f"{self.name!r} changed dtypes (expected, got): {changed}")
+        return result
+
+    def apply_chunks(self, chunks, allow_cross_row=False):
+        """Transform an iterable of frames lazily, one chunk at a time."""
+        if not self.row_local and not allow_cross_row:
+            raise TransformError(
+                f"{self.name!r} calls {', '.join(self.cross_row_calls)}, so chunked results "
+                "would differ from the whole-frame result; pass allow_cross_row=True to run anyway")
+        for chunk in chunks:
+            yield self.check_output(self(chunk))
+
+    def apply_table(self, name, out_path, chunksize=100_000, data_dir=None, allow_cross_row=False):
+        """Stream one exampledata table through the transformation into Parquet.
+
+        Returns the number of rows written. Memory use is one chunk, however
+        large the CSV is.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        from salesloader import iter_csv_table
+
+        chunks = iter_csv_table(name, chunksize, data_dir)
+        writer, rows = None, 0
+        try:
+            for result in self.apply_chunks(chunks, allow_cross_row):
+                if writer is None:
+                    if self.output_dtypes is None:
+                        self.output_dtypes = result.dtypes.astype(str).to_dict()
+                    table = pa.Table.from_pandas(result, preserve_index=False)
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                else:
+                    table = pa.Table.from_pandas(result, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                rows += len(result)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    # ── building / storing ───────────────────────────────────────────────────
+
+    @classmethod
+    def from_instruction(cls, client, instruction, sample, cache=None, name=None, **kwargs):
+        """Ask the model (or the code cache) for code, compile it and validate on `sample`."""
+        code = generate_code(client, instruction, sample, cache=cache, **kwargs)
+        transformation = cls(code, name or 'transform', instruction)
+        transformation.validate(sample)
+        return transformation
+
+    def to_dict(self):
+        return {'name': self.name, 'instruction': self.instruction, 'code': self.code,
+                'output_dtypes': self.output_dtypes}
+
+    @classmethod
+    def from_dict(cls, data):
+        transformation = cls(data['code'], data.get('name', 'transform'), data.get('instruction', ''))
+        transformation.output_dtypes = data.get('output_dtypes')
+        return transformation
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as fh:
+            return cls.from_dict(json.load(fh))
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import time
+
+    from salesloader import DATA_DIR, iter_csv_table, read_csv_table
+    from transformcache import StubClient
+
+    df = read_csv_table('orderdetails')
+    big = pd.concat([df] * 200, ignore_index=True)
+    t = Transformation.from_instruction(StubClient(), "Add a LineTotal column", df.head(5), name='linetotal')
+    print(t, t.output_dtypes['LineTotal'])
+
+    whole = t(big)
+    parts = pd.concat(t.apply_chunks(big.iloc[i:i + 5000] for i in range(0, len(big), 5000)),
+                      ignore_index=True)
+    print(f"  5,000-row chunks == whole frame: {parts.equals(whole)}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'orderdetails_linetotal.parquet')
+        rows = t.apply_table('orderdetails', out, chunksize=100)
+        print(f"  apply_table wrote {rows} rows; same as whole-frame: "
+              f"{pd.read_parquet(out).equals(t(df))}")
+        # the openaidemo.py route: validate on a plain read_csv sample (int64
+        # IDs), then stream the salesloader chunks (int32/int16 IDs)
+        plain = pd.read_csv(os.path.join(DATA_DIR, 'orderdetails.csv'), sep='|', nrows=5)
+        t2 = Transformation(t.code, 'linetotal')
+        t2.validate(plain)
+        rows = t2.apply_table('orderdetails', out, chunksize=100)
+        print(f"  validated on plain read_csv sample, apply_table wrote {rows} rows")
+
+        # what the compiled function is for: one instruction over a file in
+        # chunks, against loading the whole file for a single exec
+        big_dir = os.path.join(tmp, 'big')
+        os.makedirs(big_dir)
+        with open(os.path.join(DATA_DIR, 'orderdetails.csv')) as fh:
+            header, *lines = [line.rstrip('\n') + '\n' for line in fh]
+        with open(os.path.join(big_dir, 'orderdetails.csv'), 'w') as fh:
+            fh.write(header)
+            for _ in range(1000):
+                fh.writelines(lines)
+        t0 = time.perf_counter()
+        whole = t(read_csv_table('orderdetails', data_dir=big_dir))
+        whole.to_parquet(out)
+        t1 = time.perf_counter()
+        rows = t.apply_table('orderdetails', out, chunksize=50_000, data_dir=big_dir)
+        t2 = time.perf_counter()
+        chunk = t(next(iter_csv_table('orderdetails', 50_000, big_dir)))
+        print(f"  {rows:,} rows, whole file   {t1 - t0:5.2f}s, "
+              f"{whole.memory_usage(deep=True).sum() / 2**20:6.1f} MB frame in memory")
+        print(f"  {rows:,} rows, 50k chunks   {t2 - t1:5.2f}s, "
+              f"{chunk.memory_usage(deep=True).sum() / 2**20:6.1f} MB frame in memory")
+    try:
+        list(Transformation("df_transformed = df.sort_values('UnitPrice')").apply_chunks([df]))
+    except TransformError as err:
+        print(f"  refused: {err}")